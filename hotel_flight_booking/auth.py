@@ -4,8 +4,9 @@ from jose import jwt, JWTError
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models import User
+from principal_cache import principal_cache, attach_user
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 
@@ -33,6 +34,10 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return attach_user(db, cached)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
@@ -43,9 +48,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
+    principal_cache.put(token, payload.get("exp"), user)
     return user
 
 def get_current_admin(current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return current_user
\ No newline at end of file
+    return current_user
+
+# Async-режим: та же логика выполняется через run_sync поверх AsyncSession
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)):
+    return await db.run_sync(lambda session: get_current_user(token, session))
+
+async def get_current_admin_async(current_user: User = Depends(get_current_user_async)):
+    return get_current_admin(current_user)
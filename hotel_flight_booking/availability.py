@@ -0,0 +1,156 @@
+# availability.py
+import bisect
+import datetime
+import threading
+import time
+
+from metrics import bookings_total
+from models import Booking
+from room_calendar import calendar_index
+from settings import settings
+
+
+class RoomIntervals:
+    """Отсортированные по start_date бронирования одного номера.
+
+    book_room не допускает пересечений, поэтому интервалы одного номера
+    не перекрываются и отсортированы одновременно по началу и по концу.
+    Проверка пересечения сводится к одному bisect - O(log n).
+    """
+
+    __slots__ = ("starts", "ends", "ids", "consistent", "loaded_at")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.consistent = True
+        self.loaded_at = time.monotonic()
+
+    def add(self, booking_id, start, end):
+        if self.overlaps(start, end):
+            # В базе уже есть пересекающиеся брони (например, после гонки
+            # между воркерами) - O(log n) ответ больше не гарантирован.
+            self.consistent = False
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, booking_id)
+
+    def remove(self, booking_id):
+        try:
+            i = self.ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[i]
+        del self.ends[i]
+        del self.ids[i]
+        return True
+
+    def overlaps(self, start, end):
+        if not self.consistent:
+            return any(s < end and e > start for s, e in zip(self.starts, self.ends))
+        # Единственный кандидат на пересечение - последний интервал,
+        # начавшийся раньше end.
+        i = bisect.bisect_left(self.starts, end)
+        return i > 0 and self.ends[i - 1] > start
+
+
+class AvailabilityIndex:
+    """In-process индекс занятости номеров.
+
+    Интервалы номера загружаются из БД при первом обращении (только
+    брони, которые ещё не закончились) и дальше поддерживаются
+    book_room / cancel_booking. Брони и отмены других воркеров сюда
+    не попадают, поэтому номер старше max_age перечитывается, а ответ
+    "свободно" перед вставкой проверяется в БД (см. room_has_conflict).
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def _load(self, db, room_id):
+        rows = db.query(Booking.id, Booking.start_date, Booking.end_date).filter(
+            Booking.room_id == room_id,
+            Booking.end_date > datetime.datetime.now()
+        ).order_by(Booking.start_date).all()
+        intervals = RoomIntervals()
+        for booking_id, start, end in rows:
+            intervals.add(booking_id, start, end)
+        return intervals
+
+    def _get(self, db, room_id):
+        intervals = self._rooms.get(room_id)
+        if intervals is None or time.monotonic() - intervals.loaded_at > self.max_age:
+            loaded = self._load(db, room_id)
+            with self._lock:
+                current = self._rooms.get(room_id)
+                if current is None or current is intervals:
+                    self._rooms[room_id] = current = loaded
+                intervals = current
+        return intervals
+
+    def is_free(self, db, room_id, start, end):
+        intervals = self._get(db, room_id)
+        with self._lock:
+            return not intervals.overlaps(start, end)
+
+    def add(self, room_id, booking_id, start, end):
+        with self._lock:
+            intervals = self._rooms.get(room_id)
+            if intervals is not None:
+                intervals.add(booking_id, start, end)
+
+    def remove(self, room_id, booking_id):
+        with self._lock:
+            intervals = self._rooms.get(room_id)
+            if intervals is not None:
+                intervals.remove(booking_id)
+
+    def invalidate(self, room_id=None):
+        with self._lock:
+            if room_id is None:
+                self._rooms.clear()
+            else:
+                self._rooms.pop(room_id, None)
+
+
+def has_sql_conflict(db, room_id, start, end):
+    """Проверка пересечений в БД (использует ix_bookings_room_dates)."""
+    return db.query(Booking.id).filter(
+        Booking.room_id == room_id,
+        Booking.start_date < end,
+        Booking.end_date > start
+    ).first() is not None
+
+
+availability_index = AvailabilityIndex(settings.availability_max_age_seconds)
+
+
+def room_has_conflict(db, room_id, start, end):
+    """Есть ли бронь, пересекающая [start, end).
+
+    "Занято" индекс отвечает сам, без запроса к БД. "Свободно" перед
+    вставкой проверяется в БД: бронь мог сделать другой воркер - тогда
+    номер сбрасывается и перечитывается при следующем обращении.
+    """
+    if not availability_index.is_free(db, room_id, start, end):
+        return True
+    if has_sql_conflict(db, room_id, start, end):
+        availability_index.invalidate(room_id)
+        return True
+    return False
+
+
+# Все in-process индексы броней обновляются через эти две функции
+def booking_created(room_id, booking_id, start, end):
+    bookings_total.inc(("room", "booked"))
+    availability_index.add(room_id, booking_id, start, end)
+    calendar_index.add(room_id, booking_id, start, end)
+
+
+def booking_cancelled(room_id, booking_id):
+    availability_index.remove(room_id, booking_id)
+    calendar_index.remove(room_id, booking_id)
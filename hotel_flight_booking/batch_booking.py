@@ -0,0 +1,80 @@
+# batch_booking.py
+import datetime
+
+from availability import RoomIntervals, booking_created
+from metrics import bookings_total
+from models import Booking, Room
+from schemas import BatchMode
+
+BOOKED = "booked"
+FAILED = "failed"
+# all_or_nothing: корректная позиция, не забронированная из-за ошибок в других
+ABORTED = "aborted"
+
+
+def book_rooms_batch(db, user_id, items, mode):
+    """Бронирует пачку номеров в одной транзакции.
+
+    Доступность номеров и пересечения со всеми существующими бронями
+    проверяются двумя запросами на всю пачку; позиции пачки проверяются
+    и друг с другом в порядке следования.
+    """
+    now = datetime.datetime.now()
+    room_ids = {item.room_id for item in items}
+    available_rooms = {room_id for (room_id,) in db.query(Room.id).filter(
+        Room.id.in_(room_ids), Room.available == True
+    )}
+
+    intervals = {room_id: RoomIntervals() for room_id in room_ids}
+    existing = db.query(Booking.id, Booking.room_id, Booking.start_date, Booking.end_date).filter(
+        Booking.room_id.in_(room_ids),
+        Booking.start_date < max(item.end_date for item in items),
+        Booking.end_date > min(item.start_date for item in items)
+    )
+    for booking_id, room_id, start, end in existing:
+        intervals[room_id].add(booking_id, start, end)
+
+    results = []
+    accepted = []
+    for index, item in enumerate(items):
+        error = None
+        if item.start_date < now:
+            error = "Cannot book in the past"
+        elif item.room_id not in available_rooms:
+            error = "Room not available"
+            bookings_total.inc(("room", "not_found"))
+        elif intervals[item.room_id].overlaps(item.start_date, item.end_date):
+            error = "Room is already booked for these dates"
+            bookings_total.inc(("room", "conflict"))
+        if error:
+            results.append({"index": index, "status": FAILED, "error": error})
+            continue
+        intervals[item.room_id].add(None, item.start_date, item.end_date)
+        booking = Booking(user_id=user_id, room_id=item.room_id, start_date=item.start_date, end_date=item.end_date)
+        accepted.append((index, booking))
+        results.append({"index": index, "status": BOOKED})
+
+    failed = len(items) - len(accepted)
+    if failed and mode == BatchMode.ALL_OR_NOTHING:
+        for result in results:
+            if result["status"] == BOOKED:
+                result["status"] = ABORTED
+        return {"booked": 0, "failed": failed, "items": results}
+
+    if accepted:
+        db.add_all([booking for _, booking in accepted])
+        db.flush()
+        # Снимок до commit: после него атрибуты expired и каждый потребовал бы SELECT
+        for index, booking in accepted:
+            results[index]["booking"] = {
+                "id": booking.id,
+                "user_id": booking.user_id,
+                "room_id": booking.room_id,
+                "start_date": booking.start_date,
+                "end_date": booking.end_date
+            }
+        db.commit()
+        for index, _ in accepted:
+            created = results[index]["booking"]
+            booking_created(created["room_id"], created["id"], created["start_date"], created["end_date"])
+    return {"booked": len(accepted), "failed": failed, "items": results}
@@ -0,0 +1,313 @@
+# benchmarks/load_test.py
+"""Нагрузочный прогон API в процессе: ASGI-транспорт httpx, временная SQLite.
+
+Засевает базу объёмами, близкими к боевым (по умолчанию 10k отелей,
+100k номеров, 1M броней, 100k рейсов; --scale уменьшает всё
+пропорционально), затем --concurrency воркеров в течение --duration
+секунд выполняют смесь сценариев: поиск отелей, свободных номеров и
+рейсов, бронирование, отмена, логин. По каждому сценарию - p50/p95/p99,
+пропускная способность и ответы по статусам; результат пишется в JSON
+и может сравниваться с сохранённым baseline.
+
+    python benchmarks/load_test.py --scale 0.1 --duration 20 -o baseline.json
+    python benchmarks/load_test.py --scale 0.1 --duration 20 --compare baseline.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HOTELS = 10_000
+ROOMS_PER_HOTEL = 10
+BOOKINGS_PER_ROOM = 10
+FLIGHTS = 100_000
+USERS = 1_000
+CITIES = 50
+PASSWORD = "loadtest"
+CHUNK = 50_000
+
+# Вес сценария в смеси по умолчанию
+SCENARIOS = {
+    "search_hotels": 25,
+    "search_free_rooms": 20,
+    "search_flights": 25,
+    "book_room": 15,
+    "cancel_booking": 10,
+    "login": 5,
+}
+
+
+def city(i):
+    return f"City {i % CITIES}"
+
+
+def chunks(rows, size=CHUNK):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(engine, scale, now):
+    from sqlalchemy import insert
+    from auth import get_password_hash
+    from models import Booking, Flight, Hotel, Room, User
+
+    hotels = max(1, int(HOTELS * scale))
+    rooms = hotels * ROOMS_PER_HOTEL
+    flights = max(1, int(FLIGHTS * scale))
+    users = max(1, int(USERS * scale))
+    password = get_password_hash(PASSWORD)
+    rng = random.Random(1)
+
+    def bookings():
+        # Непересекающиеся брони на ~70 дней вокруг "сейчас"
+        for room_id in range(1, rooms + 1):
+            start = now - datetime.timedelta(days=30 - rng.randint(0, 3))
+            for _ in range(BOOKINGS_PER_ROOM):
+                end = start + datetime.timedelta(days=rng.randint(1, 4))
+                yield {"user_id": rng.randint(1, users), "room_id": room_id, "start_date": start, "end_date": end}
+                start = end + datetime.timedelta(days=rng.randint(0, 4))
+
+    def flight_rows():
+        for _ in range(flights):
+            a, b = rng.sample(range(CITIES), 2)
+            departure = now + datetime.timedelta(minutes=rng.randint(60, 60 * 24 * 60))
+            yield {
+                "from_city": city(a), "to_city": city(b),
+                "departure": departure, "arrival": departure + datetime.timedelta(minutes=rng.randint(60, 600)),
+                "total_seats": 180, "booked_seats": rng.randint(0, 170), "price": rng.randint(50, 900)
+            }
+
+    tables = (
+        (User, ({"name": f"user{i}", "email": f"user{i}@load.test", "password": password, "role": "user"} for i in range(users))),
+        (Hotel, ({"name": f"Hotel {i}", "city": city(i), "stars": 1 + i % 5} for i in range(hotels))),
+        (Room, ({
+            "hotel_id": 1 + i // ROOMS_PER_HOTEL, "room_type": ("standard", "large", "premium")[i % 3],
+            "price": 50 + i % 400, "capacity": 1 + i % 4, "available": True
+        } for i in range(rooms))),
+        (Booking, bookings()),
+        (Flight, flight_rows()),
+    )
+    counts = {}
+    for model, rows in tables:
+        counts[model.__tablename__] = 0
+        for batch in chunks(rows):
+            with engine.begin() as conn:
+                conn.execute(insert(model), batch)
+            counts[model.__tablename__] += len(batch)
+    return {"users": users, "hotels": hotels, "rooms": rooms, "flights": flights, "counts": counts}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, name, elapsed, status):
+        self.latencies.setdefault(name, []).append(elapsed)
+        by_status = self.statuses.setdefault(name, {})
+        by_status[status] = by_status.get(status, 0) + 1
+
+    def summary(self, duration):
+        result = {}
+        for name, values in sorted(self.latencies.items()):
+            values.sort()
+            q = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+            result[name] = {
+                "requests": len(values),
+                "rps": round(len(values) / duration, 2),
+                "p50_ms": round(q[49] * 1000, 3),
+                "p95_ms": round(q[94] * 1000, 3),
+                "p99_ms": round(q[98] * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+                "statuses": {str(k): v for k, v in sorted(self.statuses[name].items())},
+            }
+        return result
+
+
+class Worker:
+    def __init__(self, client, data, rng, now):
+        from auth import create_access_token
+        self.client = client
+        self.data = data
+        self.rng = rng
+        self.now = now
+        self.user_id = rng.randint(1, data["users"])
+        token = create_access_token({"sub": str(self.user_id)})
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.my_bookings = []
+
+    def dates(self, max_nights=4):
+        start = self.now + datetime.timedelta(days=self.rng.randint(1, 45))
+        return start, start + datetime.timedelta(days=self.rng.randint(1, max_nights))
+
+    async def search_hotels(self):
+        return await self.client.get("/hotels/", params={
+            "city": city(self.rng.randrange(CITIES)), "sort_by_stars": True, "limit": 20
+        })
+
+    async def search_free_rooms(self):
+        start, end = self.dates()
+        return await self.client.get("/hotels/rooms/free", params={
+            "city": city(self.rng.randrange(CITIES)),
+            "start_date": start.isoformat(), "end_date": end.isoformat(),
+            "capacity": self.rng.randint(1, 4), "sort_by_price": True, "limit": 20
+        })
+
+    async def search_flights(self):
+        a, b = self.rng.sample(range(CITIES), 2)
+        return await self.client.get("/flights/", params={"from_city": city(a), "to_city": city(b), "passengers": 2})
+
+    async def book_room(self):
+        start, end = self.dates()
+        response = await self.client.post("/bookings/", headers=self.headers, json={
+            "room_id": self.rng.randint(1, self.data["rooms"]),
+            "start_date": start.isoformat(), "end_date": end.isoformat()
+        })
+        if response.status_code == 200:
+            self.my_bookings.append(response.json()["id"])
+        return response
+
+    async def cancel_booking(self):
+        if not self.my_bookings:
+            return await self.book_room()
+        booking_id = self.my_bookings.pop(self.rng.randrange(len(self.my_bookings)))
+        return await self.client.delete(f"/bookings/{booking_id}", headers=self.headers)
+
+    async def login(self):
+        return await self.client.post("/users/login", data={
+            "username": f"user{self.rng.randrange(self.data['users'])}@load.test", "password": PASSWORD
+        })
+
+
+async def run_load(app, data, args, now):
+    import httpx
+
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name] for name in names]
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+
+    async def worker(index, deadline, record):
+        rng = random.Random(index)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load.test") as client:
+            w = Worker(client, data, rng, now)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                response = await getattr(w, name)()
+                if record:
+                    recorder.add(name, time.perf_counter() - started, response.status_code)
+
+    if args.warmup:
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(worker(-1 - i, deadline, False) for i in range(args.concurrency)))
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(worker(i, deadline, True) for i in range(args.concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current, tolerance):
+    """Печатает разницу с baseline; возвращает число регрессий p95 / rps сверх tolerance."""
+    regressions = 0
+    print(f"\n{'scenario':20} {'p95 base':>10} {'p95 now':>10} {'change':>8} {'rps base':>10} {'rps now':>10} {'change':>8}")
+    for name, now in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name:20} (not in baseline)")
+            continue
+        p95_change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        rps_change = (now["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        regressed = p95_change > tolerance or rps_change < -tolerance
+        regressions += regressed
+        print(
+            f"{name:20} {base['p95_ms']:10.2f} {now['p95_ms']:10.2f} {p95_change:+8.1%} "
+            f"{base['rps']:10.1f} {now['rps']:10.1f} {rps_change:+8.1%}{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="Fraction of the default data volumes")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--async-db", action="store_true", help="Use the async routers (USE_ASYNC_DB=1)")
+    parser.add_argument("--no-response-cache", action="store_true")
+    parser.add_argument("--database", help="SQLite file to use (default: a temporary file)")
+    parser.add_argument("-o", "--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p95/rps change before a regression")
+    args = parser.parse_args()
+
+    # Настройки читаются при импорте модулей приложения
+    path = args.database or os.path.join(tempfile.mkdtemp(prefix="load-test-"), "load.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["USE_ASYNC_DB"] = "1" if args.async_db else "0"
+    os.environ["SLOW_REQUEST_MS"] = "0"
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_TTL"] = "0"
+
+    from database import Base, engine
+    from main import app
+
+    now = datetime.datetime.now().replace(microsecond=0)
+    seeded = time.perf_counter()
+    Base.metadata.create_all(engine)
+    data = seed(engine, args.scale, now)
+    seed_seconds = time.perf_counter() - seeded
+    print(f"seeded {data['counts']} in {seed_seconds:.1f}s", file=sys.stderr)
+
+    scenarios = asyncio.run(run_load(app, data, args, now))
+    result = {
+        "revision": git_revision(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "scale": args.scale, "concurrency": args.concurrency, "duration": args.duration,
+            "async_db": args.async_db, "response_cache": not args.no_response_cache,
+        },
+        "seed": {"seconds": round(seed_seconds, 1), **data["counts"]},
+        "scenarios": scenarios,
+    }
+
+    print(f"{'scenario':20} {'requests':>9} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for name, s in scenarios.items():
+        print(f"{name:20} {s['requests']:9} {s['rps']:9.1f} {s['p50_ms']:9.2f} {s['p95_ms']:9.2f} {s['p99_ms']:9.2f}  {s['statuses']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            json.dump(result, out, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), result, args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# benchmarks/metrics_overhead.py
+"""Накладные расходы MetricsMiddleware на один запрос.
+
+Минимальное ASGI-приложение (start + пустое тело, scope["route"] как после
+роутинга) вызывается напрямую и через MetricsMiddleware; разница лучших
+прогонов (как в timeit) - цена middleware без сети, роутинга и сериализации.
+
+    python benchmarks/metrics_overhead.py --requests 100000 --repeat 15
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Histogram, MetricsMiddleware
+
+
+class Route:
+    path = "/hotels/"
+
+
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b""}
+
+
+async def app(scope, receive, send):
+    scope["route"] = Route
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request"}
+
+
+async def send(message):
+    pass
+
+
+async def run(target, requests):
+    scope = {"type": "http", "method": "GET"}
+    started = time.perf_counter()
+    for _ in range(requests):
+        await target(scope, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def measure(requests, repeat):
+    middleware = MetricsMiddleware(app, Histogram("bench", "bench", ("method", "route", "status")))
+    bare, wrapped = [], []
+    # Попеременно, чтобы частота CPU и шум влияли на оба варианта одинаково
+    for _ in range(repeat):
+        bare.append(await run(app, requests))
+        wrapped.append(await run(middleware, requests))
+    return min(bare), min(wrapped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    bare, wrapped = asyncio.run(measure(args.requests, args.repeat))
+    print(f"app           {bare * 1e9:8.0f} ns")
+    print(f"+middleware   {wrapped * 1e9:8.0f} ns")
+    print(f"overhead      {(wrapped - bare) * 1e9:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/routes.py
+"""Время RouteGraph.search на большом расписании.
+
+Заполняет временную SQLite-базу рейсами между --cities городами на
+--days дней вперёд, загружает граф и замеряет поиск маршрутов: с датой
+и без, по цене и по длительности, а также в город без входящих рейсов.
+
+    python benchmarks/routes.py --flights 100000 --cities 50
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from database import Base, create_db_engine
+from models import Flight
+from route_search import RouteGraph
+from settings import Settings
+
+
+def seed(engine, flights, cities, days):
+    rng = random.Random(1)
+    start = datetime.datetime.now().replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+    rows = []
+    for _ in range(flights):
+        # Последний город - без входящих рейсов
+        from_city, to_city = rng.sample(range(cities - 1), 2)
+        departure = start + datetime.timedelta(minutes=rng.randrange(days * 24 * 60))
+        rows.append({
+            "from_city": f"City {from_city}", "to_city": f"City {to_city}",
+            "departure": departure, "arrival": departure + datetime.timedelta(minutes=rng.randint(60, 600)),
+            "price": rng.randint(50, 500), "total_seats": 180, "booked_seats": rng.randint(0, 180)
+        })
+    with engine.begin() as conn:
+        conn.execute(insert(Flight), rows)
+    return start
+
+
+def measure(graph, repeat, **params):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        routes = graph.search(**params)
+        best = min(best, time.perf_counter() - started)
+    return best, len(routes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flights", type=int, default=100000)
+    parser.add_argument("--cities", type=int, default=50)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Settings(database_url=f"sqlite:///{os.path.join(tmp, 'routes.db')}"))
+        Base.metadata.create_all(engine)
+        start = seed(engine, args.flights, args.cities, args.days)
+        graph = RouteGraph()
+        with Session(engine) as db:
+            graph.load(db)
+        engine.dispose()
+
+    day = start + datetime.timedelta(days=1)
+    unreachable = f"City {args.cities - 1}"
+    cases = [
+        ("dated, price", {"date": day}),
+        ("dated, duration", {"date": day, "sort_by": "duration"}),
+        ("undated, price", {}),
+        ("undated, duration", {"sort_by": "duration"}),
+        ("undated, unreachable", {"to_city": unreachable}),
+        ("undated, via", {"via_cities": ["City 3"]}),
+    ]
+    for name, params in cases:
+        params = {"from_city": "City 0", "to_city": "City 1", **params}
+        elapsed, found = measure(graph, args.repeat, **params)
+        print(f"{name:22} {elapsed * 1000:8.1f} ms  {found} routes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/serialization.py
+"""Стоимость сериализации ответов поиска на 10k строк: dict'ы против моделей.
+
+Данные выбираются из временной SQLite-базы теми же запросами, что и в
+роутерах, и заранее держатся в памяти - время запроса к ASGI-приложению
+почти целиком уходит на сериализацию. Варианты:
+
+    before  - dict'ы, собранные вручную (response_model=list[dict] для
+              отелей и номеров, без модели и с jsonable_encoder для рейсов)
+    typed   - строки SQL + типизированные модели (HotelOut, RoomListItem,
+              FlightSearchOut): FastAPI >= 0.130 сериализует их сразу в
+              JSON-байты через pydantic-core
+    orjson  - те же модели с ORJSONResponse (если установлен orjson);
+              отключает этот быстрый путь FastAPI, оставлен для сравнения
+
+Модель выигрывает только у рейсов (jsonable_encoder); для отелей и номеров
+валидация строк дороже list[dict], поэтому роутеры оставлены на dict'ах.
+
+    python benchmarks/serialization.py --rows 10000 --repeat 7
+"""
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import Flight, Hotel, Room
+from room_search import room_listing_query
+from schemas import FlightSearchOut, HotelOut, RoomFilter
+
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401
+except ImportError:
+    ORJSONResponse = None
+
+
+class RoomListItem(BaseModel):
+    id: int
+    hotel: str
+    type: str
+    price: float
+    capacity: int
+
+    class Config:
+        from_attributes = True
+
+
+def load_rows(rows):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    departure = datetime.datetime(2026, 1, 1, 8, 30)
+    with engine.begin() as conn:
+        conn.execute(insert(Hotel), [{"name": f"Hotel {i}", "city": "Moscow", "stars": 1 + i % 5} for i in range(rows)])
+        conn.execute(insert(Room), [
+            {"hotel_id": 1 + i, "room_type": "standard", "price": 100 + i % 300, "capacity": 2}
+            for i in range(rows)
+        ])
+        conn.execute(insert(Flight), [{
+            "from_city": "Moscow", "to_city": "Paris",
+            "departure": departure + datetime.timedelta(minutes=i),
+            "arrival": departure + datetime.timedelta(minutes=i + 180),
+            "total_seats": 100, "booked_seats": i % 100, "price": 99.5
+        } for i in range(rows)])
+    with Session(engine) as db:
+        hotels = db.scalars(select(Hotel)).all()
+        rooms = db.execute(room_listing_query(RoomFilter())).all()
+        flights = db.execute(select(
+            Flight.id, Flight.from_city.label("from"), Flight.to_city.label("to"),
+            Flight.departure, Flight.arrival, Flight.price,
+            (Flight.total_seats - Flight.booked_seats).label("available")
+        )).all()
+        db.expunge_all()
+    return hotels, rooms, flights
+
+
+def build_app(hotels, rooms, flights):
+    app = FastAPI()
+
+    # Как было в роутерах до типизации: dict'ы собираются на каждый запрос
+    app.get("/before/hotels", response_model=list[dict])(
+        lambda: [{"id": h.id, "name": h.name, "city": h.city, "stars": h.stars} for h in hotels]
+    )
+    app.get("/before/rooms", response_model=list[dict])(lambda: [{
+        "id": r.id, "hotel": r.hotel, "type": r.type, "price": r.price, "capacity": r.capacity
+    } for r in rooms])
+    app.get("/before/flights")(lambda: [{
+        "id": f.id, "from": f._mapping["from"], "to": f.to, "departure": f.departure,
+        "arrival": f.arrival, "price": f.price, "available": f.available
+    } for f in flights])
+
+    app.get("/typed/hotels", response_model=list[HotelOut])(lambda: hotels)
+    app.get("/typed/rooms", response_model=list[RoomListItem])(lambda: rooms)
+    app.get("/typed/flights", response_model=list[FlightSearchOut])(lambda: flights)
+
+    if ORJSONResponse is not None:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            app.get("/orjson/hotels", response_model=list[HotelOut], response_class=ORJSONResponse)(lambda: hotels)
+            app.get("/orjson/rooms", response_model=list[RoomListItem], response_class=ORJSONResponse)(lambda: rooms)
+            app.get("/orjson/flights", response_model=list[FlightSearchOut], response_class=ORJSONResponse)(lambda: flights)
+    return app
+
+
+def measure(client, path, repeat):
+    client.get(path)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path)
+        timings.append(time.perf_counter() - started)
+    assert response.status_code == 200, response.text
+    return statistics.median(timings) * 1000, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    client = TestClient(build_app(*load_rows(args.rows)))
+    variants = ("before", "typed") + (("orjson",) if ORJSONResponse is not None else ())
+    for endpoint in ("hotels", "rooms", "flights"):
+        for variant in variants:
+            ms, size = measure(client, f"/{variant}/{endpoint}", args.repeat)
+            print(f"{endpoint:8} {variant:7} {ms:8.1f} ms  {size / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/sqlite_profile.py
+"""Пропускная способность SQLite под конкурентной нагрузкой бронирования.
+
+Запускает писателей (проверка пересечений + вставка брони + commit, как в
+book_room) и читателей (листинг номеров, как в get_rooms) на временной
+файловой базе - сначала с настройками SQLite по умолчанию, затем с
+профилем PRAGMA из database.apply_sqlite_profile.
+
+    python benchmarks/sqlite_profile.py --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import exc, insert
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from models import Booking, Hotel, Room, User
+from settings import Settings
+
+
+def seed(engine, rooms):
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"name": "bench", "email": "bench@example.com", "password": "x"}])
+        conn.execute(insert(Hotel), [{"name": f"Hotel {i}", "city": "Moscow", "stars": 1 + i % 5} for i in range(rooms // 10)])
+        conn.execute(insert(Room), [
+            {"hotel_id": 1 + i // 10, "room_type": "standard", "price": 100 + i % 300, "capacity": 2}
+            for i in range(rooms)
+        ])
+
+
+def writer(Session, rooms, deadline, counters):
+    base = datetime.datetime.now() + datetime.timedelta(days=1)
+    while time.perf_counter() < deadline:
+        room_id = random.randint(1, rooms)
+        start = base + datetime.timedelta(days=random.randint(0, 3650))
+        end = start + datetime.timedelta(days=random.randint(1, 7))
+        db = Session()
+        try:
+            conflict = db.query(Booking.id).filter(
+                Booking.room_id == room_id,
+                Booking.start_date < end,
+                Booking.end_date > start
+            ).first()
+            if conflict is None:
+                db.add(Booking(user_id=1, room_id=room_id, start_date=start, end_date=end))
+                db.commit()
+            counters["writes"] += 1
+        except exc.OperationalError:
+            # "database is locked" - писатель не дождался блокировки
+            db.rollback()
+            counters["errors"] += 1
+        finally:
+            db.close()
+
+
+def reader(Session, deadline, counters):
+    while time.perf_counter() < deadline:
+        db = Session()
+        try:
+            db.query(Room.id, Room.price, Hotel.name).join(Hotel).filter(
+                Room.price <= random.randint(100, 400)
+            ).limit(100).all()
+            counters["reads"] += 1
+        except exc.OperationalError:
+            counters["errors"] += 1
+        finally:
+            db.close()
+
+
+def run(tuned, args):
+    directory = tempfile.mkdtemp(prefix="sqlite-bench-")
+    settings = Settings(
+        database_url=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        sqlite_tuning=tuned,
+        db_pool_size=args.writers + args.readers,
+    )
+    engine = create_db_engine(settings)
+    Base.metadata.create_all(engine)
+    seed(engine, args.rooms)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    counters = {"writes": 0, "reads": 0, "errors": 0}
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=writer, args=(Session, args.rooms, deadline, counters)) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(Session, deadline, counters)) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return {
+        "writes_per_sec": counters["writes"] / args.seconds,
+        "reads_per_sec": counters["reads"] / args.seconds,
+        "errors": counters["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for name, tuned in (("default", False), ("tuned", True)):
+        result = run(tuned, args)
+        print(f"{name:8} writes/s={result['writes_per_sec']:9.1f}  reads/s={result['reads_per_sec']:9.1f}  errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/startup.py
+"""Холодный старт воркера: импорт приложения, lifespan и первый запрос.
+
+Каждый прогон - отдельный процесс (как новый воркер uvicorn) на
+временной SQLite, заранее подготовленной init_db.py. Измеряется:
+
+    import         - import main (роутеры, модели, схемы, middleware)
+    lifespan       - startup-часть lifespan
+    first_request  - первый GET /hotels/ (соединение с базой, сборка
+                     сериализаторов ответа)
+
+Медианы по --runs процессам пишутся в JSON и сравниваются с baseline.
+
+    python benchmarks/startup.py --runs 15 -o startup.json
+    python benchmarks/startup.py --runs 15 --compare startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ("import", "lifespan", "first_request")
+
+
+def child():
+    """Один холодный старт; печатает длительности фаз в мс одной JSON-строкой."""
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from main import app
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        ready = time.perf_counter()
+        response = client.get("/hotels/")
+        answered = time.perf_counter()
+    assert response.status_code == 200, response.text
+
+    print(json.dumps({
+        "import": (imported - started) * 1000,
+        "lifespan": (ready - imported) * 1000,
+        "first_request": (answered - ready) * 1000,
+    }))
+
+
+def measure(runs, env):
+    samples = {phase: [] for phase in PHASES}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            env=env, cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        for phase, value in json.loads(output.splitlines()[-1]).items():
+            samples[phase].append(value)
+    return {
+        phase: {"median_ms": round(statistics.median(values), 2), "max_ms": round(max(values), 2)}
+        for phase, values in samples.items()
+    }
+
+
+def compare(baseline, current, tolerance):
+    """Печатает разницу медиан с baseline; возвращает число регрессий сверх tolerance."""
+    regressions = 0
+    print(f"\n{'phase':15} {'base ms':>10} {'now ms':>10} {'change':>8}")
+    for phase, now in current["phases"].items():
+        base = baseline["phases"].get(phase)
+        if base is None:
+            print(f"{phase:15} (not in baseline)")
+            continue
+        change = (now["median_ms"] - base["median_ms"]) / base["median_ms"] if base["median_ms"] else 0.0
+        regressed = change > tolerance
+        regressions += regressed
+        print(f"{phase:15} {base['median_ms']:10.2f} {now['median_ms']:10.2f} {change:+8.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--async-db", action="store_true", help="Use the async routers (USE_ASYNC_DB=1)")
+    parser.add_argument("-o", "--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median change before a regression")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return 0
+
+    path = os.path.join(tempfile.mkdtemp(prefix="startup-"), "startup.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", USE_ASYNC_DB="1" if args.async_db else "0")
+    subprocess.run([sys.executable, "init_db.py", "--create-all"], env=env, cwd=ROOT, check=True, capture_output=True)
+
+    from load_test import git_revision
+    result = {
+        "revision": git_revision(),
+        "config": {"runs": args.runs, "async_db": args.async_db},
+        "phases": measure(args.runs, env),
+    }
+    print(f"{'phase':15} {'median ms':>10} {'max ms':>10}")
+    for phase, stats in result["phases"].items():
+        print(f"{phase:15} {stats['median_ms']:10.2f} {stats['max_ms']:10.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            json.dump(result, out, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), result, args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
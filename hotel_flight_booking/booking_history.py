@@ -0,0 +1,45 @@
+# booking_history.py
+import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager, joinedload
+
+from models import Booking, Flight, FlightBooking, Room
+from schemas import BookingPeriod
+
+
+def room_bookings_query(user_id, when=None, now=None):
+    """(select, ключи сортировки) для броней номеров пользователя.
+
+    Идёт по ix_bookings_user_start; номер и отель подгружаются тем же
+    запросом. upcoming - ещё не закончившиеся, от ближайших; past -
+    закончившиеся, от последних.
+    """
+    now = now or datetime.datetime.now()
+    query = select(Booking).where(Booking.user_id == user_id).options(
+        joinedload(Booking.room).joinedload(Room.hotel)
+    )
+    if when == BookingPeriod.UPCOMING:
+        query = query.where(Booking.end_date > now)
+    elif when == BookingPeriod.PAST:
+        query = query.where(Booking.end_date <= now)
+    descending = when == BookingPeriod.PAST
+    return query, [(Booking.start_date, descending), (Booking.id, descending)]
+
+
+def flight_bookings_query(user_id, when=None, now=None):
+    """(select, ключи сортировки) для броней рейсов по дате вылета; рейс - из того же JOIN."""
+    now = now or datetime.datetime.now()
+    query = select(FlightBooking).join(FlightBooking.flight).where(
+        FlightBooking.user_id == user_id
+    ).options(contains_eager(FlightBooking.flight))
+    if when == BookingPeriod.UPCOMING:
+        query = query.where(Flight.departure > now)
+    elif when == BookingPeriod.PAST:
+        query = query.where(Flight.departure <= now)
+    descending = when == BookingPeriod.PAST
+    return query, [(Flight.departure, descending), (FlightBooking.id, descending)]
+
+
+def flight_booking_keys(booking):
+    return [booking.flight.departure, booking.id]
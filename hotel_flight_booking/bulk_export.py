@@ -0,0 +1,101 @@
+# bulk_export.py
+"""Потоковая выгрузка броней номеров и перелётов в NDJSON / CSV.
+
+    python bulk_export.py bookings --format csv --from 2026-01-01 --to 2026-02-01 -o bookings.csv
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import sys
+
+from sqlalchemy import select
+
+from models import Booking, FlightBooking
+
+YIELD_PER = 1000
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# kind -> (колонки, колонка для фильтра по датам)
+EXPORTS = {
+    "bookings": (
+        (Booking.id, Booking.user_id, Booking.room_id, Booking.start_date, Booking.end_date),
+        Booking.start_date,
+    ),
+    "flight_bookings": (
+        (FlightBooking.id, FlightBooking.user_id, FlightBooking.flight_id, FlightBooking.passengers, FlightBooking.booking_date),
+        FlightBooking.booking_date,
+    ),
+}
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+def iter_partitions(db, kind, date_from=None, date_to=None):
+    """Строки выгрузки порциями по YIELD_PER через серверный курсор."""
+    columns, date_column = EXPORTS[kind]
+    query = select(*columns).order_by(columns[0])
+    if date_from is not None:
+        query = query.where(date_column >= date_from)
+    if date_to is not None:
+        query = query.where(date_column < date_to)
+    result = db.execute(query.execution_options(yield_per=YIELD_PER))
+    yield from result.partitions()
+
+
+def encode(partitions, kind, fmt):
+    names = [column.key for column in EXPORTS[kind][0]]
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for rows in partitions:
+            writer.writerows([_plain(v) for v in row] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for rows in partitions:
+            yield "".join(
+                json.dumps(dict(zip(names, map(_plain, row))), separators=(",", ":")) + "\n"
+                for row in rows
+            )
+
+
+def stream_export(kind, fmt, date_from=None, date_to=None):
+    """Генератор для StreamingResponse: сессия живёт, пока выгрузка читается."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        yield from encode(iter_partitions(db, kind, date_from, date_to), kind, fmt)
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export bookings as NDJSON or CSV")
+    parser.add_argument("kind", choices=sorted(EXPORTS))
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--from", dest="date_from", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--to", dest="date_to", type=datetime.datetime.fromisoformat)
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for chunk in stream_export(args.kind, args.format, args.date_from, args.date_to):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
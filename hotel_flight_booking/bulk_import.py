@@ -0,0 +1,256 @@
+# bulk_import.py
+"""Потоковый импорт отелей, номеров и рейсов из CSV / NDJSON.
+
+    python bulk_import.py flights feed.csv --errors flights_errors.ndjson
+"""
+import argparse
+import csv
+import enum
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+
+from models import Flight, Hotel, Room
+from schemas import FlightCreate, HotelCreate, RoomCreate
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+FORMATS = ("csv", "ndjson")
+
+KINDS = {
+    "hotels": (Hotel, HotelCreate),
+    "rooms": (Room, RoomCreate),
+    "flights": (Flight, FlightCreate),
+}
+# kind -> (поле записи, модель): ссылки, существование которых проверяется до вставки
+REFERENCES = {
+    "rooms": (("hotel_id", Hotel),),
+}
+
+
+class ImportReport:
+    def __init__(self, kind):
+        self.kind = kind
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.chunks = 0
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "chunks": self.chunks
+        }
+
+
+class ErrorFile:
+    """NDJSON с отклонёнными строками; файл создаётся при первой ошибке."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._file = None
+
+    def write(self, row_number, record, errors):
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"row": row_number, "errors": errors, "record": record}, default=str) + "\n")
+        self.rows += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def errors_dir():
+    return settings.import_errors_dir or os.path.join(tempfile.gettempdir(), "hotel-booking-import-errors")
+
+
+def error_report_path(report_id):
+    return os.path.join(errors_dir(), f"{report_id}.ndjson")
+
+
+def purge_error_reports(now=None):
+    """Удаляет отчёты об ошибках старше settings.import_errors_ttl_seconds."""
+    now = now or time.time()
+    try:
+        names = os.listdir(errors_dir())
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for name in names:
+        path = os.path.join(errors_dir(), name)
+        try:
+            if now - os.path.getmtime(path) > settings.import_errors_ttl_seconds:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def detect_format(filename):
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_rows(lines, fmt):
+    """(номер строки, запись или None, ошибка разбора или None) - по одной строке за раз."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # Пустая ячейка - значение не задано, сработает default схемы
+            yield reader.line_num, {k: v for k, v in record.items() if v not in ("", None)}, None
+    else:
+        for row_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Row must be a JSON object"
+                continue
+            yield row_number, record, None
+
+
+def _values(obj):
+    return {k: v.value if isinstance(v, enum.Enum) else v for k, v in obj.dict().items()}
+
+
+def _missing(db, chunk, field, model):
+    ids = {values[field] for _, values in chunk}
+    existing = {id for (id,) in db.query(model.id).filter(model.id.in_(ids))}
+    return ids - existing
+
+
+def _insert_chunk(db, model, chunk, reject):
+    """executemany всей пачки; при ошибке БД - по строке, чтобы отклонить только виновные."""
+    try:
+        db.execute(insert(model), [values for _, values in chunk])
+        db.commit()
+        return len(chunk)
+    except DBAPIError:
+        db.rollback()
+    inserted = 0
+    for row_number, values in chunk:
+        try:
+            db.execute(insert(model), [values])
+            db.commit()
+        except DBAPIError as e:
+            db.rollback()
+            reject(row_number, values, [f"Database error: {e.orig}"])
+        else:
+            inserted += 1
+    return inserted
+
+
+def import_rows(db, kind, rows, chunk_size=CHUNK_SIZE, on_error=None, on_progress=None):
+    """Валидирует строки схемой *Create и вставляет их пачками через executemany.
+
+    Каждая пачка коммитится отдельно, поэтому память не растёт с размером
+    файла; пачка, на которой упала БД, повторяется по строке.
+    on_error(row_number, record, errors) вызывается для каждой отклонённой
+    строки, on_progress(report) - после каждой пачки.
+    """
+    model, schema = KINDS[kind]
+    report = ImportReport(kind)
+    chunk = []
+
+    def reject(row_number, record, errors):
+        report.failed += 1
+        if on_error is not None:
+            on_error(row_number, record, errors)
+
+    def flush():
+        for field, ref_model in REFERENCES.get(kind, ()):
+            missing = _missing(db, chunk, field, ref_model) if chunk else ()
+            if missing:
+                for row_number, values in chunk:
+                    if values[field] in missing:
+                        reject(row_number, values, [f"{ref_model.__name__} {values[field]} not found"])
+                chunk[:] = [(n, values) for n, values in chunk if values[field] not in missing]
+        if chunk:
+            report.imported += _insert_chunk(db, model, chunk, reject)
+        report.chunks += 1
+        chunk.clear()
+        if on_progress is not None:
+            on_progress(report)
+
+    for row_number, record, error in rows:
+        report.total += 1
+        if error is not None:
+            reject(row_number, record, [error])
+            continue
+        try:
+            values = _values(schema(**record))
+        except ValidationError as e:
+            reject(row_number, record, [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()])
+            continue
+        chunk.append((row_number, values))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return report
+
+
+def after_import(kind):
+    # Импорт в обход роутеров - сбрасываем in-process индексы и кэш ответов
+    from response_cache import response_cache
+    response_cache.invalidate(kind)
+    if kind == "flights":
+        from route_search import route_graph
+        route_graph.invalidate()
+        from seat_inventory import seat_inventory
+        seat_inventory.invalidate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import of hotels, rooms and flights")
+    parser.add_argument("kind", choices=sorted(KINDS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--errors", help="NDJSON file for rejected rows")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+
+    fmt = args.format or detect_format(args.path)
+    error_file = ErrorFile(args.errors) if args.errors else None
+    on_error = error_file.write if error_file is not None else None
+
+    def on_progress(report):
+        print(f"{report.kind}: {report.imported} imported, {report.failed} failed", file=sys.stderr)
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8", newline="") as lines:
+            report = import_rows(db, args.kind, iter_rows(lines, fmt), args.chunk_size, on_error, on_progress)
+    finally:
+        db.close()
+        if error_file is not None:
+            error_file.close()
+    print(json.dumps(report.to_dict()))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
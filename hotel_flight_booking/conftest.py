@@ -0,0 +1,100 @@
+# conftest.py
+import atexit
+import os
+import shutil
+import tempfile
+
+# Тесты работают на временной SQLite-базе и не трогают test.db: in-memory
+# база не видна async-движку, а API-тесты идут и через async-роутеры
+_tmp_dir = tempfile.mkdtemp(prefix="booking-tests-")
+atexit.register(shutil.rmtree, _tmp_dir, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ["USE_ASYNC_DB"] = "0"
+os.environ["IMPORT_ERRORS_DIR"] = os.path.join(_tmp_dir, "import-errors")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from auth import create_access_token
+from availability import availability_index
+from database import Base, SessionLocal, engine, get_async_sessionmaker
+from models import User
+from principal_cache import principal_cache
+from response_cache import response_cache
+from room_calendar import calendar_index
+from route_search import route_graph
+from seat_inventory import seat_inventory
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    availability_index.invalidate()
+    calendar_index.invalidate()
+    principal_cache.clear()
+    response_cache.clear()
+    route_graph.invalidate()
+    seat_inventory.invalidate()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+_apps = {}
+
+
+def get_app(mode):
+    if mode not in _apps:
+        from main import app, create_app
+        _apps[mode] = create_app(use_async_db=True) if mode == "async" else app
+    return _apps[mode]
+
+
+@pytest.fixture(params=["sync", "async"])
+def client(request, db):
+    """Клиент для sync-роутеров и для routers/async_*.py."""
+    return TestClient(get_app(request.param))
+
+
+def engines():
+    """Sync-движок и sync_engine async-движка: события SQL обоих режимов."""
+    import database
+    get_async_sessionmaker()
+    return [engine, database.async_engine.sync_engine]
+
+
+def make_user(db, email="user@example.com", role="user"):
+    user = User(name=email.split("@")[0], email=email, password="-", role=role)
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": str(user.id)})
+    return user, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_headers(db):
+    return make_user(db, "admin@example.com", "admin")[1]
+
+
+@pytest.fixture
+def user_headers(db):
+    return make_user(db)[1]
+
+
+@pytest.fixture
+def statements():
+    """Список SQL-запросов, выполненных движком за время теста."""
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    for db_engine in engines():
+        event.listen(db_engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    for db_engine in engines():
+        event.remove(db_engine, "before_cursor_execute", before_cursor_execute)
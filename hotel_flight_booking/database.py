@@ -1,17 +1,187 @@
 # database.py
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, StaticPool
+from settings import settings
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+SQLALCHEMY_DATABASE_URL = settings.database_url
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.get_async_database_url()
+# USE_ASYNC_DB=1 - подключить async-версии роутеров (routers/async_*.py)
+USE_ASYNC_DB = settings.use_async_db
+
+
+class PoolStats:
+    """Время получения соединения из пула (включая ожидание свободного)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, elapsed, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+
+
+pool_stats = PoolStats()
+
+
+class _TimedPoolMixin:
+    def connect(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            pool_stats.record(time.perf_counter() - started, timed_out)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(url, settings, is_async=False):
+    options = {"echo": settings.db_echo}
+    connect_args = {}
+    if url.get_backend_name() == "sqlite":
+        connect_args["check_same_thread"] = False
+        if url.database in (None, "", ":memory:"):
+            # Одно соединение на процесс, иначе каждая сессия видит пустую базу
+            options["poolclass"] = StaticPool
+            options["connect_args"] = connect_args
+            return options
+    elif settings.db_statement_timeout_ms:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+    return options
+
+
+def sqlite_pragmas(settings=settings, in_memory=False):
+    pragmas = [
+        ("synchronous", settings.sqlite_synchronous),
+        ("busy_timeout", settings.sqlite_busy_timeout_ms),
+        ("cache_size", settings.sqlite_cache_size),
+        ("temp_store", settings.sqlite_temp_store),
+    ]
+    if not in_memory:
+        # WAL и mmap имеют смысл только для файловой базы
+        pragmas.insert(0, ("journal_mode", settings.sqlite_journal_mode))
+        pragmas.append(("mmap_size", settings.sqlite_mmap_size))
+    return pragmas
+
+
+def apply_sqlite_profile(sync_engine, settings=settings):
+    url = sync_engine.url
+    if url.get_backend_name() != "sqlite" or not settings.sqlite_tuning:
+        return
+    pragmas = sqlite_pragmas(settings, in_memory=url.database in (None, "", ":memory:"))
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_db_engine(settings=settings):
+    url = make_url(settings.database_url)
+    db_engine = create_engine(url, **_engine_options(url, settings))
+    apply_sqlite_profile(db_engine, settings)
+    return db_engine
+
+
+def create_async_db_engine(settings=settings):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    url = make_url(settings.get_async_database_url())
+    db_engine = create_async_engine(url, **_engine_options(url, settings, is_async=True))
+    apply_sqlite_profile(db_engine.sync_engine, settings)
+    return db_engine
+
+
+engine = create_db_engine()
 
 Base = declarative_base()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_async_sessionmaker():
+    # Движок создаётся лениво: aiosqlite нужен только в async-режиме
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        async_engine = create_async_db_engine()
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return AsyncSessionLocal
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+def create_schema(bind=None):
+    """Недостающие таблицы и индексы по моделям (create_all)."""
+    import models  # noqa: F401 - регистрирует таблицы в Base.metadata
+    Base.metadata.create_all(bind=bind or engine)
+
+async def dispose_engines():
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+def get_pool_status():
+    """Состояние пулов соединений и статистика ожидания соединения."""
+    status = {
+        "checkouts": pool_stats.checkouts,
+        "timeouts": pool_stats.timeouts,
+        "wait_avg_ms": pool_stats.wait_total / (pool_stats.checkouts or 1) * 1000,
+        "wait_max_ms": pool_stats.wait_max * 1000,
+    }
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    for name, db_engine in engines.items():
+        pool = db_engine.pool
+        if isinstance(pool, QueuePool):
+            status[name] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            }
+    return status
@@ -0,0 +1,200 @@
+# idempotency.py
+"""Idempotency-Key для POST бронирований.
+
+Первый запрос с ключом захватывает строку idempotency_keys (PK -
+пользователь и ключ) и выполняет обработчик; ответ записывается в ту же
+транзакцию, что и бронь (см. run_idempotent). Повтор
+с тем же телом получает сохранённый ответ без повторного выполнения;
+с другим телом - 422; пока первый запрос не завершён - 409. Ответы
+5xx не сохраняются: ключ освобождается, и клиент может повторить.
+Просроченные ключи удаляются не чаще settings.idempotency_purge_interval_seconds.
+
+Функции работают с sync Session; async-роутеры вызывают их через
+run_idempotent_async (AsyncSession.run_sync).
+"""
+import datetime
+import hashlib
+import json
+import threading
+import time
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from metrics import idempotency_requests_total
+from models import IdempotencyKey
+from settings import settings
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def request_fingerprint(endpoint, payload):
+    """Хэш эндпоинта и тела запроса (pydantic-модели)."""
+    data = endpoint.encode() + b"\0" + payload.model_dump_json().encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def purge_expired(db, now=None):
+    """Удаляет просроченные ключи; возвращает число удалённых."""
+    now = now or datetime.datetime.now()
+    cutoff = now - datetime.timedelta(seconds=settings.idempotency_ttl_seconds)
+    deleted = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+
+def _purge_if_due(db, now):
+    global _last_purge
+    with _purge_lock:
+        if time.monotonic() - _last_purge < settings.idempotency_purge_interval_seconds:
+            return
+        _last_purge = time.monotonic()
+    purge_expired(db, now)
+
+
+def _reclaimable(record, now):
+    age = (now - record.created_at).total_seconds()
+    if record.status_code is None:
+        return age >= settings.idempotency_lock_timeout_seconds
+    return age >= settings.idempotency_ttl_seconds
+
+
+def _replay(record, fingerprint):
+    if record.request_hash != fingerprint:
+        idempotency_requests_total.inc(("mismatch",))
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Idempotency-Key was already used with a different request"
+        )
+    if record.status_code is None:
+        idempotency_requests_total.inc(("in_progress",))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
+    idempotency_requests_total.inc(("replayed",))
+    return JSONResponse(
+        json.loads(record.response), status_code=record.status_code, headers={REPLAYED_HEADER: "true"}
+    )
+
+
+def claim_key(db, user_id, key, fingerprint, now=None):
+    """None - ключ захвачен, запрос нужно выполнить; иначе - JSONResponse повтора."""
+    now = now or datetime.datetime.now()
+    _purge_if_due(db, now)
+    record = db.get(IdempotencyKey, (user_id, key))
+    if record is not None and _reclaimable(record, now):
+        db.delete(record)
+        db.flush()
+        record = None
+    if record is None:
+        db.add(IdempotencyKey(user_id=user_id, key=key, request_hash=fingerprint, created_at=now))
+        try:
+            db.commit()
+            idempotency_requests_total.inc(("executed",))
+            return None
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом успел раньше
+            db.rollback()
+            record = db.get(IdempotencyKey, (user_id, key))
+            if record is None:
+                idempotency_requests_total.inc(("in_progress",))
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress"
+                )
+    return _replay(record, fingerprint)
+
+
+def _record_response(db, user_id, key, status_code, body):
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .values(status_code=status_code, response=json.dumps(body))
+    )
+
+
+def store_response(db, user_id, key, status_code, body):
+    _record_response(db, user_id, key, status_code, body)
+    db.commit()
+
+
+def finish_with_error(db, user_id, key, exc):
+    """Откатывает изменения обработчика; 4xx сохраняется, иначе ключ освобождается."""
+    db.rollback()
+    if isinstance(exc, HTTPException) and exc.status_code < 500:
+        store_response(db, user_id, key, exc.status_code, {"detail": jsonable_encoder(exc.detail)})
+        return
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key))
+    db.commit()
+
+
+def encode_response(result, response_model=None):
+    if response_model is not None:
+        result = response_model.model_validate(result)
+    return jsonable_encoder(result)
+
+
+def run_idempotent(db, user_id, key, fingerprint, handler, response_model=None):
+    """Выполняет handler(commit) не более одного раза на ключ.
+
+    handler вызывает commit(result) вместо db.commit(): ответ пишется в
+    строку ключа в той же транзакции, что и бронь, поэтому бронь без
+    сохранённого ответа (и повторное выполнение) невозможны. Без ключа
+    commit - обычный db.commit().
+    """
+    if key is None:
+        return handler(lambda result: db.commit())
+    replay = claim_key(db, user_id, key, fingerprint)
+    if replay is not None:
+        return replay
+    committed = {}
+
+    def commit(result):
+        # Ответ собирается до commit, который expire'ит ORM-объекты результата
+        body = encode_response(result, response_model)
+        _record_response(db, user_id, key, status.HTTP_200_OK, body)
+        db.commit()
+        committed["body"] = body
+
+    try:
+        handler(commit)
+    except Exception as exc:
+        # После commit ключ уже хранит ответ - его не трогаем
+        if "body" not in committed:
+            finish_with_error(db, user_id, key, exc)
+        raise
+    return committed["body"]
+
+
+async def run_idempotent_async(db, user_id, key, fingerprint, handler, response_model=None):
+    """То же для AsyncSession; handler - корутинная функция, commit - корутина."""
+    if key is None:
+        async def commit(result):
+            await db.commit()
+        return await handler(commit)
+    replay = await db.run_sync(claim_key, user_id, key, fingerprint)
+    if replay is not None:
+        return replay
+    committed = {}
+
+    async def commit(result):
+        body = encode_response(result, response_model)
+        await db.run_sync(_record_response, user_id, key, status.HTTP_200_OK, body)
+        await db.commit()
+        committed["body"] = body
+
+    try:
+        await handler(commit)
+    except Exception as exc:
+        if "body" not in committed:
+            await db.run_sync(finish_with_error, user_id, key, exc)
+        raise
+    return committed["body"]
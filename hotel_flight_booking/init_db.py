@@ -0,0 +1,59 @@
+# init_db.py
+"""Подготовка схемы базы из DATABASE_URL; запускается один раз перед воркерами.
+
+    python init_db.py               # alembic upgrade head
+    python init_db.py --create-all  # create_all по моделям + alembic stamp head
+"""
+import argparse
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from database import create_schema, engine
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Ревизия, совпадающая со схемой create_all до появления миграций
+BASELINE_REVISION = "0001"
+
+
+def alembic_config():
+    config = Config(os.path.join(HERE, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(HERE, "migrations"))
+    return config
+
+
+def migrate(config=None, bind=None):
+    config = config or alembic_config()
+    with (bind or engine).begin() as connection:
+        # env.py использует это соединение вместо своего движка
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        if tables and "alembic_version" not in tables:
+            # База создана через create_all: миграции после 0001 идут с IF NOT EXISTS
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+
+
+def create_all(config=None, bind=None):
+    config = config or alembic_config()
+    with (bind or engine).begin() as connection:
+        create_schema(connection)
+        config.attributes["connection"] = connection
+        command.stamp(config, "head")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--create-all", action="store_true", help="create_all instead of migrations (development, tests)")
+    args = parser.parse_args()
+    if args.create_all:
+        create_all()
+    else:
+        migrate()
+    print(f"✅ Схема готова: {engine.url.render_as_string(hide_password=True)}")
+
+
+if __name__ == "__main__":
+    main()
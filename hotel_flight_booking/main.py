@@ -1,17 +1,67 @@
 # main.py
-from fastapi import FastAPI
-from database import engine, Base
-from routers import users, hotels, bookings, flights
+import asyncio
+from contextlib import asynccontextmanager
 
-app = FastAPI(debug=True)
+from fastapi import FastAPI, Response
+from starlette.concurrency import run_in_threadpool
+from database import USE_ASYNC_DB, create_schema, dispose_engines
+from settings import settings
 
-Base.metadata.create_all(bind=engine)
+from routers import admin, debug
+from response_cache import ResponseCacheMiddleware
+from profiling import ProfilingMiddleware
+from metrics import CONTENT_TYPE, MetricsMiddleware, register_app_metrics, registry
+from password_hashing import password_hasher
+from seat_inventory import run_reconciler
 
-app.include_router(users.router)
-app.include_router(hotels.router)
-app.include_router(bookings.router)
-app.include_router(flights.router)
 
-@app.get("/")
-def root():
-    return {"message": "Welcome to Hotel & Flight Booking API!"}
\ No newline at end of file
+# Импорт приложения не обращается к базе: схема готовится через init_db.py
+# (или AUTO_CREATE_SCHEMA=1 при разработке), соединения открываются лениво
+@asynccontextmanager
+async def lifespan(app):
+    if settings.auto_create_schema:
+        await run_in_threadpool(create_schema)
+    reconciler = None
+    if settings.seat_inventory and settings.seat_inventory_reconcile_seconds > 0:
+        reconciler = asyncio.create_task(run_reconciler(settings.seat_inventory_reconcile_seconds, app.state.use_async_db))
+    yield
+    if reconciler is not None:
+        reconciler.cancel()
+    password_hasher.shutdown()
+    await dispose_engines()
+
+
+def create_app(use_async_db=USE_ASYNC_DB):
+    """Приложение с sync- или async-роутерами (USE_ASYNC_DB; тесты собирают оба)."""
+    app = FastAPI(debug=settings.debug, lifespan=lifespan)
+    app.state.use_async_db = use_async_db
+
+    app.add_middleware(ResponseCacheMiddleware)
+    if settings.profiling:
+        # Добавлен последним - внешний слой, учитывает и ответы из кэша
+        app.add_middleware(ProfilingMiddleware)
+    if settings.metrics:
+        app.add_middleware(MetricsMiddleware)
+        register_app_metrics()
+
+    # Импортируется только нужный набор роутеров
+    if use_async_db:
+        from routers import async_users as users, async_hotels as hotels, async_bookings as bookings, async_flights as flights
+    else:
+        from routers import users, hotels, bookings, flights
+    for module in (users, hotels, bookings, flights, admin, debug):
+        app.include_router(module.router)
+
+    @app.get("/")
+    def root():
+        return {"message": "Welcome to Hotel & Flight Booking API!"}
+
+    # async: сборка в потоке event loop'а, где обновляются Gauge и Histogram
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,285 @@
+# metrics.py
+"""In-process метрики в текстовом формате Prometheus (GET /metrics).
+
+Counter и Histogram.observe защищены блокировкой и могут обновляться из
+любого потока (sync-роутеры, хэшер паролей). Gauge и Histogram.series(...)
+обновляются без блокировки и предназначены для кода в потоке event loop'а -
+MetricsMiddleware держит серию на каждый маршрут.
+Метрики других модулей (пул, кэши) читаются только при сборке ответа
+через CallbackMetric.
+"""
+import threading
+import weakref
+from bisect import bisect_left
+from time import perf_counter
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы бакетов в секундах
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}" for labels, v in items]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value, labels=()):
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [счётчики по бакетам (последний - +Inf, не накопительные), сумма]
+        self._series = {}
+
+    def observe(self, value, labels=()):
+        with self._lock:
+            series = self._get_series(labels)
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def series(self, labels=()):
+        """Список счётчиков одной серии для записи без блокировки."""
+        with self._lock:
+            return self._get_series(labels)
+
+    def _get_series(self, labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        return series
+
+    def count(self, labels=()):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        items = sorted((labels, list(series)) for labels, series in list(self._series.items()))
+        lines = self.header()
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Значения считаются при сборке: collect() -> {кортеж меток: значение}."""
+
+    def __init__(self, name, help, type, collect, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.collect = collect
+
+    def render(self):
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(self.collect().items())
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, type, collect, labelnames=()):
+        return self.register(CallbackMetric(name, help, type, collect, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+bookings_total = registry.counter(
+    "bookings_total", "Booking attempts by kind (room, flight) and outcome (booked, conflict, not_found)",
+    ("kind", "outcome")
+)
+idempotency_requests_total = registry.counter(
+    "idempotency_requests_total", "Requests with Idempotency-Key by outcome (executed, replayed, in_progress, mismatch)",
+    ("outcome",)
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "Argon2 hash/verify time, excluding queue wait", ("operation",), HASH_BUCKETS
+)
+password_hash_queue_wait = registry.histogram(
+    "password_hash_queue_wait_seconds", "Time spent waiting for a free Argon2 slot", buckets=HASH_BUCKETS
+)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность по шаблону маршрута.
+
+    Маршрут берётся из scope["route"] после роутинга; для ненайденных
+    путей - "unmatched", чтобы не плодить серии на каждый 404. Серии
+    гистограммы кэшируются по (метод, маршрут, статус).
+    """
+
+    def __init__(self, app, histogram=None):
+        self.app = app
+        self.histogram = histogram or http_request_duration
+        self.buckets = self.histogram.buckets
+        self._series = {}
+        # Запросы в обработке; http_requests_in_flight - сумма по экземплярам
+        self.in_flight = 0
+        _middlewares.add(self)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        # Обычная функция, а не корутина: возвращает awaitable самого send
+        def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            return send(message)
+
+        self.in_flight += 1
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - started
+            self.in_flight -= 1
+            key = (scope["method"], getattr(scope.get("route"), "path", "unmatched"), status[0])
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self.histogram.series(key)
+            # То же, что Histogram.observe, без блокировки и поиска серии
+            series[bisect_left(self.buckets, elapsed)] += 1
+            series[-1] += elapsed
+
+
+_middlewares = weakref.WeakSet()
+registry.callback("http_requests_in_flight", "HTTP requests being processed", "gauge",
+    lambda: {(): sum(m.in_flight for m in list(_middlewares))})
+
+
+def register_app_metrics():
+    """Метрики модулей, которые читаются при сборке /metrics."""
+    from database import get_pool_status
+    from password_hashing import password_hasher
+    from principal_cache import principal_cache
+    from response_cache import response_cache
+    from seat_inventory import seat_inventory
+
+    def pool(key):
+        def collect():
+            status = get_pool_status()
+            return {(name,): status[name][key] for name in ("sync", "async") if name in status}
+        return collect
+
+    registry.callback("db_pool_size", "Configured pool size", "gauge", pool("size"), ("engine",))
+    registry.callback("db_pool_checked_out", "Connections in use", "gauge", pool("checked_out"), ("engine",))
+    registry.callback("db_pool_overflow", "Overflow connections", "gauge", pool("overflow"), ("engine",))
+    registry.callback("db_pool_checkouts_total", "Connection checkouts", "counter",
+        lambda: {(): get_pool_status()["checkouts"]})
+    registry.callback("db_pool_timeouts_total", "Connection checkout timeouts", "counter",
+        lambda: {(): get_pool_status()["timeouts"]})
+
+    registry.callback("auth_cache_hits_total", "Principal cache hits", "counter",
+        lambda: {(): principal_cache.hits})
+    registry.callback("auth_cache_misses_total", "Principal cache misses", "counter",
+        lambda: {(): principal_cache.misses})
+    registry.callback("auth_cache_size", "Cached principals", "gauge",
+        lambda: {(): principal_cache.stats()["size"]})
+
+    registry.callback("password_hash_rejected_total", "Hash requests rejected with 503", "counter",
+        lambda: {(): password_hasher.rejected})
+
+    registry.callback("response_cache_hits_total", "Response cache hits", "counter",
+        lambda: {(): response_cache.hits})
+    registry.callback("response_cache_misses_total", "Response cache misses", "counter",
+        lambda: {(): response_cache.misses})
+
+    registry.callback("seat_inventory_hits_total", "Flight searches served from the seat inventory", "counter",
+        lambda: {(): seat_inventory.hits})
+    registry.callback("seat_inventory_misses_total", "Flight searches that loaded the route from the database", "counter",
+        lambda: {(): seat_inventory.misses})
+    registry.callback("seat_inventory_routes", "Routes held in the seat inventory", "gauge",
+        lambda: {(): seat_inventory.stats()["routes"]})
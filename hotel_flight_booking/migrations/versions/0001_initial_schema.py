@@ -0,0 +1,81 @@
+"""initial schema
+
+Таблицы в том виде, в котором их создавал Base.metadata.create_all,
+без вторичных индексов - они в 0002.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), unique=True),
+        sa.Column('password', sa.String()),
+        sa.Column('role', sa.String()),
+    )
+    op.create_table(
+        'hotels',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String()),
+        sa.Column('city', sa.String()),
+        sa.Column('stars', sa.Integer()),
+    )
+    op.create_table(
+        'flights',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('from_city', sa.String()),
+        sa.Column('to_city', sa.String()),
+        sa.Column('departure', sa.DateTime()),
+        sa.Column('arrival', sa.DateTime()),
+        sa.Column('total_seats', sa.Integer()),
+        sa.Column('booked_seats', sa.Integer()),
+        sa.Column('price', sa.Float()),
+    )
+    op.create_table(
+        'rooms',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('hotel_id', sa.Integer(), sa.ForeignKey('hotels.id')),
+        sa.Column('room_type', sa.String()),
+        sa.Column('price', sa.Float()),
+        sa.Column('capacity', sa.Integer()),
+        sa.Column('available', sa.Boolean()),
+    )
+    op.create_table(
+        'bookings',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('room_id', sa.Integer(), sa.ForeignKey('rooms.id')),
+        sa.Column('start_date', sa.DateTime()),
+        sa.Column('end_date', sa.DateTime()),
+    )
+    op.create_table(
+        'flight_bookings',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('flight_id', sa.Integer(), sa.ForeignKey('flights.id')),
+        sa.Column('passengers', sa.Integer()),
+        sa.Column('booking_date', sa.DateTime()),
+    )
+    op.create_table(
+        'flight_connections',
+        sa.Column('flight_id', sa.Integer(), sa.ForeignKey('flights.id')),
+        sa.Column('connection_id', sa.Integer(), sa.ForeignKey('flights.id')),
+    )
+
+
+def downgrade():
+    for table in ('flight_connections', 'flight_bookings', 'bookings', 'rooms', 'flights', 'hotels', 'users'):
+        op.drop_table(table)
@@ -0,0 +1,40 @@
+"""hot path indexes
+
+Индексы под частые запросы. Room(hotel_id), Booking(room_id, start_date)
+и Booking(user_id) покрываются левыми префиксами составных индексов,
+отдельные не создаются. IF NOT EXISTS - базы, созданные через
+create_all, уже содержат часть индексов; такую базу можно довести до
+head после alembic stamp 0001.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки)
+INDEXES = [
+    ('ix_hotels_city_stars', 'hotels', ['city', 'stars']),
+    ('ix_rooms_hotel_type_price', 'rooms', ['hotel_id', 'room_type', 'price']),
+    ('ix_bookings_room_dates', 'bookings', ['room_id', 'start_date', 'end_date']),
+    ('ix_bookings_user_start', 'bookings', ['user_id', 'start_date']),
+    ('ix_flights_route_departure', 'flights', ['from_city', 'to_city', 'departure']),
+    ('ix_flight_bookings_user', 'flight_bookings', ['user_id']),
+    ('ix_flight_bookings_flight', 'flight_bookings', ['flight_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
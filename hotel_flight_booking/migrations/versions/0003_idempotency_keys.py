@@ -0,0 +1,36 @@
+"""idempotency keys
+
+IF NOT EXISTS - как в 0002: база, созданная через create_all, может уже
+содержать таблицу.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('key', sa.String(255), primary_key=True),
+        sa.Column('request_hash', sa.String(32), nullable=False),
+        sa.Column('status_code', sa.Integer()),
+        sa.Column('response', sa.Text()),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index('ix_idempotency_keys_created', 'idempotency_keys', ['created_at'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_keys_created', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,36 @@
+"""hotel stars not null
+
+Отели без звёзд получают stars = 0, колонка становится NOT NULL.
+ix_hotels_city_stars (city, stars) заменяется на (city, stars DESC, id) -
+в порядке GET /hotels/?sort_by_stars=true, чтобы keyset-страница читалась
+из индекса без сортировки всех отелей города. Равенство по city / stars
+индекс покрывает так же, как прежний.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE hotels SET stars = 0 WHERE stars IS NULL")
+    op.drop_index('ix_hotels_city_stars', table_name='hotels', if_exists=True)
+    # SQLite не умеет ALTER COLUMN - batch пересоздаёт таблицу
+    with op.batch_alter_table('hotels') as batch_op:
+        batch_op.alter_column('stars', existing_type=sa.Integer(), nullable=False, server_default='0')
+    op.create_index('ix_hotels_city_stars_id', 'hotels', ['city', sa.text('stars DESC'), 'id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_hotels_city_stars_id', table_name='hotels', if_exists=True)
+    with op.batch_alter_table('hotels') as batch_op:
+        batch_op.alter_column('stars', existing_type=sa.Integer(), nullable=True, server_default=None)
+    op.create_index('ix_hotels_city_stars', 'hotels', ['city', 'stars'], if_not_exists=True)
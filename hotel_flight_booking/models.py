@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Table
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Table, Index, Text
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -23,9 +23,14 @@ class Hotel(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String)
     city = Column(String)
-    stars = Column(Integer)
+    # 0 - без категории; NOT NULL, чтобы сортировка по звёздам шла по индексу
+    stars = Column(Integer, nullable=False, default=0, server_default='0')
     rooms = relationship("Room", back_populates="hotel")
 
+    __table_args__ = (
+        Index('ix_hotels_city_stars_id', 'city', stars.desc(), 'id'),
+    )
+
 class Room(Base):
     __tablename__ = 'rooms'
     id = Column(Integer, primary_key=True)
@@ -37,6 +42,10 @@ class Room(Base):
     hotel = relationship("Hotel", back_populates="rooms")
     bookings = relationship("Booking", back_populates="room")
 
+    __table_args__ = (
+        Index('ix_rooms_hotel_type_price', 'hotel_id', 'room_type', 'price'),
+    )
+
 class Booking(Base):
     __tablename__ = 'bookings'
     id = Column(Integer, primary_key=True)
@@ -47,6 +56,12 @@ class Booking(Base):
     user = relationship("User", back_populates="bookings")
     room = relationship("Room", back_populates="bookings")
 
+    __table_args__ = (
+        Index('ix_bookings_room_dates', 'room_id', 'start_date', 'end_date'),
+        # "Мои брони": фильтр по пользователю и сортировка по дате заезда
+        Index('ix_bookings_user_start', 'user_id', 'start_date'),
+    )
+
 class Flight(Base):
     __tablename__ = 'flights'
     id = Column(Integer, primary_key=True)
@@ -59,6 +74,11 @@ class Flight(Base):
     price = Column(Float)
     bookings = relationship("FlightBooking", back_populates="flight")
 
+    __table_args__ = (
+        # Поиск рейсов по направлению и дате вылета
+        Index('ix_flights_route_departure', 'from_city', 'to_city', 'departure'),
+    )
+
 class FlightBooking(Base):
     __tablename__ = 'flight_bookings'
     id = Column(Integer, primary_key=True)
@@ -67,4 +87,24 @@ class FlightBooking(Base):
     passengers = Column(Integer)
     booking_date = Column(DateTime)  # 🔥 ИСПРАВЛЕНО
     user = relationship("User", back_populates="flight_bookings")
-    flight = relationship("Flight", back_populates="bookings")
\ No newline at end of file
+    flight = relationship("Flight", back_populates="bookings")
+
+    __table_args__ = (
+        Index('ix_flight_bookings_user', 'user_id'),
+        Index('ix_flight_bookings_flight', 'flight_id'),
+    )
+
+class IdempotencyKey(Base):
+    """Сохранённый ответ на POST с заголовком Idempotency-Key (см. idempotency.py)."""
+    __tablename__ = 'idempotency_keys'
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(32), nullable=False)
+    status_code = Column(Integer)  # None - запрос ещё выполняется
+    response = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Удаление просроченных ключей
+        Index('ix_idempotency_keys_created', 'created_at'),
+    )
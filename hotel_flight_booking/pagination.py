@@ -0,0 +1,103 @@
+# pagination.py
+import base64
+import datetime
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _cursor_value(column, value):
+    """Значение курсора того же типа, что и колонка ключа; иначе ValueError."""
+    if value is None:
+        raise ValueError("NULL cursor value")
+    python_type = column.type.python_type
+    # В JSON дата хранится строкой, а DateTime в SQLite принимает только datetime
+    if python_type is datetime.datetime:
+        if not isinstance(value, str):
+            raise ValueError("Expected ISO datetime")
+        return datetime.datetime.fromisoformat(value)
+    if isinstance(value, bool):
+        raise ValueError("Unexpected boolean")
+    if python_type is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, python_type):
+        raise ValueError(f"Expected {python_type.__name__}")
+    return value
+
+
+def cursor_values(keys, cursor):
+    values = decode_cursor(cursor, len(keys))
+    try:
+        return [_cursor_value(column, value) for (column, _), value in zip(keys, values)]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def order_by_keys(keys):
+    """keys - список (колонка, по_убыванию); колонки ключей - NOT NULL."""
+    return [column.desc() if descending else column.asc() for column, descending in keys]
+
+
+def after_keys(keys, values):
+    """Условие "строка идёт после values" в порядке keys (keyset-пагинация).
+
+    Для (stars DESC, id ASC) и (4, 17) это
+    stars < 4 OR (stars = 4 AND id > 17).
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def page_query(query, keys, limit, cursor=None):
+    """Добавляет условие курсора, ORDER BY и LIMIT (+1 строка - признак следующей страницы).
+
+    Работает и с Query, и с select() для AsyncSession.
+    """
+    if cursor:
+        query = query.filter(after_keys(keys, cursor_values(keys, cursor)))
+    return query.order_by(*order_by_keys(keys)).limit(limit + 1)
+
+
+def split_page(rows, keys, limit, key_of=None):
+    """Возвращает (строки страницы, курсор следующей страницы или None).
+
+    key_of(row) - значения ключей строки; по умолчанию атрибуты с именами колонок.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if key_of is None:
+        values = [getattr(last, column.key) for column, _ in keys]
+    else:
+        values = key_of(last)
+    return rows, encode_cursor(values)
+
+
+def paginate(query, keys, limit, cursor=None, key_of=None):
+    return split_page(page_query(query, keys, limit, cursor).all(), keys, limit, key_of)
@@ -0,0 +1,118 @@
+# password_hashing.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+
+from auth import get_password_hash, verify_password
+from metrics import password_hash_duration, password_hash_queue_wait
+
+# 0 - хэшировать в потоках event loop'а вместо отдельных процессов
+HASH_POOL_WORKERS = 2
+HASH_MAX_CONCURRENCY = 2
+HASH_MAX_QUEUE = 64
+
+
+class PasswordHasher:
+    """Argon2 в пуле процессов с ограничением параллелизма и очереди.
+
+    Не больше max_concurrency хэшей выполняется одновременно, не больше
+    max_queue запросов ждут своей очереди - остальные сразу получают 503,
+    чтобы всплеск логинов не копился в памяти и не занимал event loop.
+    """
+
+    def __init__(self, workers=HASH_POOL_WORKERS, max_concurrency=HASH_MAX_CONCURRENCY, max_queue=HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._executor = None
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+
+    def _get_executor(self):
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _get_semaphore(self, loop):
+        # asyncio.Semaphore привязан к event loop'у, на котором используется
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, operation, func, *args):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again later",
+                headers={"Retry-After": "1"},
+            )
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        wait = started_at - queued_at
+        self.queue_wait_total += wait
+        self.queue_wait_max = max(self.queue_wait_max, wait)
+        password_hash_queue_wait.observe(wait)
+        self.running += 1
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.running -= 1
+            semaphore.release()
+            elapsed = time.perf_counter() - started_at
+            self.completed += 1
+            self.hash_time_total += elapsed
+            self.hash_time_max = max(self.hash_time_max, elapsed)
+            password_hash_duration.observe(elapsed, (operation,))
+
+    async def hash(self, password):
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, plain, hashed):
+        return await self._run("verify", verify_password, plain, hashed)
+
+    def stats(self):
+        completed = self.completed or 1
+        return {
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg_ms": self.queue_wait_total / completed * 1000,
+            "queue_wait_max_ms": self.queue_wait_max * 1000,
+            "hash_time_avg_ms": self.hash_time_total / completed * 1000,
+            "hash_time_max_ms": self.hash_time_max * 1000
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,99 @@
+# principal_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from models import User
+
+PRINCIPAL_CACHE_SIZE = 10_000
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+
+# Хэш пароля в кэше не держим: он нужен только при логине
+CACHED_FIELDS = ("id", "name", "email", "role")
+
+
+class PrincipalCache:
+    """LRU-кэш пользователей по JWT с ограниченным временем жизни.
+
+    Ключ - сам токен, поэтому попадание означает, что ровно эта строка
+    уже прошла проверку подписи; запись живёт не дольше TTL и не дольше
+    exp токена.
+    """
+
+    def __init__(self, maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, fields = entry
+            if expires_at <= now:
+                self._drop(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return fields
+
+    def put(self, token, exp, user):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        fields = {name: getattr(user, name) for name in CACHED_FIELDS}
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (expires_at, fields)
+            self._tokens_by_user.setdefault(fields["id"], set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._drop(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def _drop(self, token):
+        _, fields = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(fields["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[fields["id"]]
+
+
+def attach_user(db, fields):
+    """Возвращает User, привязанный к сессии, без SELECT."""
+    user = User(**fields)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,177 @@
+# profiling.py
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Текст самого медленного запроса обрезается до этой длины
+MAX_STATEMENT_LENGTH = 500
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """SQL-статистика одного HTTP-запроса.
+
+    Объект кладётся в contextvar в middleware; контекст копируется в
+    threadpool (sync-роутеры) и в greenlet'ы AsyncSession, поэтому
+    обработчики событий движка видят тот же объект.
+    """
+
+    __slots__ = ("method", "path", "route", "status", "statements", "db_time", "slowest_time", "slowest_sql", "total_time")
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.route = path
+        self.status = None
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = None
+        self.total_time = 0.0
+
+    def record(self, statement, elapsed):
+        self.statements += 1
+        self.db_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_sql = statement
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} queries", '
+            f'db-slowest;dur={self.slowest_time * 1000:.2f}, '
+            f'app;dur={self.total_time * 1000:.2f}'
+        )
+
+    def to_dict(self):
+        return {
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "statements": self.statements,
+            "db_ms": round(self.db_time * 1000, 3),
+            "total_ms": round(self.total_time * 1000, 3),
+            "slowest_ms": round(self.slowest_time * 1000, 3),
+            "slowest_sql": self.slowest_sql[:MAX_STATEMENT_LENGTH] if self.slowest_sql else None,
+        }
+
+
+class ProfileStore:
+    """Последние профили и агрегаты по маршрутам для /debug/profile."""
+
+    def __init__(self, history):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=history)
+        self._routes = {}
+
+    def add(self, profile):
+        with self._lock:
+            self._recent.append(profile)
+            key = (profile.method, profile.route)
+            route = self._routes.get(key)
+            if route is None:
+                route = self._routes[key] = {"requests": 0, "statements": 0, "db_time": 0.0, "total_time": 0.0, "max_statements": 0}
+            route["requests"] += 1
+            route["statements"] += profile.statements
+            route["db_time"] += profile.db_time
+            route["total_time"] += profile.total_time
+            route["max_statements"] = max(route["max_statements"], profile.statements)
+
+    def routes(self):
+        with self._lock:
+            items = list(self._routes.items())
+        return [{
+            "method": method,
+            "route": route,
+            "requests": data["requests"],
+            "avg_statements": round(data["statements"] / data["requests"], 2),
+            "max_statements": data["max_statements"],
+            "avg_db_ms": round(data["db_time"] / data["requests"] * 1000, 3),
+            "avg_total_ms": round(data["total_time"] / data["requests"] * 1000, 3),
+        } for (method, route), data in sorted(items, key=lambda item: -item[1]["db_time"])]
+
+    def recent(self, limit):
+        with self._lock:
+            profiles = list(self._recent)[-limit:]
+        return [profile.to_dict() for profile in reversed(profiles)]
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+            self._routes.clear()
+
+
+profile_store = ProfileStore(settings.profile_history)
+
+
+# Слушатели висят на классе Engine: покрывают и sync-движок, и лениво
+# создаваемый async (его sync_engine); вне профилируемого запроса - один get()
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is not None:
+        started = conn.info.get("profile_started")
+        if started:
+            profile.record(statement, time.perf_counter() - started.pop())
+
+
+class ProfilingMiddleware:
+    """ASGI-middleware: профиль SQL на запрос, заголовок Server-Timing,
+    лог запросов дольше settings.slow_request_ms."""
+
+    def __init__(self, app, store=None, slow_request_ms=None):
+        self.app = app
+        self.store = store or profile_store
+        self.slow_request_ms = settings.slow_request_ms if slow_request_ms is None else slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current.set(profile)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                profile.total_time = time.perf_counter() - started
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", profile.server_timing().encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            profile.total_time = time.perf_counter() - started
+            route = scope.get("route")
+            if route is not None:
+                profile.route = getattr(route, "path", profile.path)
+            self.store.add(profile)
+            if self.slow_request_ms and profile.total_time * 1000 >= self.slow_request_ms:
+                logger.warning(
+                    "Slow request %s %s: %.1f ms, %d statements, db %.1f ms, slowest %.1f ms: %s",
+                    profile.method, profile.path, profile.total_time * 1000, profile.statements,
+                    profile.db_time * 1000, profile.slowest_time * 1000,
+                    (profile.slowest_sql or "")[:MAX_STATEMENT_LENGTH]
+                )
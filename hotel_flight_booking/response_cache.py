@@ -0,0 +1,206 @@
+# response_cache.py
+import abc
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode
+
+from settings import settings
+
+# Публичные read-heavy эндпоинты: путь -> пространство ключей
+CACHED_ROUTES = {
+    "/hotels/": "hotels",
+    "/hotels/rooms": "rooms",
+    "/flights/": "flights",
+}
+# Заголовки ответа, которые сохраняются вместе с телом
+STORED_HEADERS = (b"content-type", b"x-next-cursor")
+
+
+class CacheBackend(abc.ABC):
+    """Хранилище кэша. Интерфейс повторяет GET / SET EX / INCRBY, чтобы его
+    можно было реализовать поверх Redis; значения - кортежи из bytes."""
+
+    @abc.abstractmethod
+    def get(self, key):
+        """Значение или None, если ключа нет или он просрочен."""
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl):
+        """Сохраняет значение на ttl секунд."""
+
+    @abc.abstractmethod
+    def incr(self, key, amount=1):
+        """Счётчик поколений; incr(key, 0) - текущее значение."""
+
+    @abc.abstractmethod
+    def clear(self):
+        """Удаляет все значения и счётчики."""
+
+    def stats(self):
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU с TTL. Счётчики хранятся отдельно и не вытесняются."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = self._counters.get(key, 0) + amount
+            self._counters[key] = value
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def stats(self):
+        return {"size": len(self._entries), "evictions": self.evictions}
+
+
+class ResponseCache:
+    """Кэш готовых ответов публичного поиска.
+
+    Ключ - пространство, его поколение и отсортированные query-параметры.
+    invalidate() увеличивает поколение: старые записи становятся
+    недостижимы и доживают до TTL или вытеснения. Ответ, посчитанный
+    до инвалидации, сохраняется под старым поколением и не всплывёт.
+    """
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def key(self, namespace, query_string):
+        params = urlencode(sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)))
+        generation = self.backend.incr(f"gen:{namespace}", 0)
+        return f"{namespace}:{generation}:{params}"
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key, headers, body):
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        entry = (tuple(headers), body, etag.encode())
+        self.backend.set(key, entry, self.ttl)
+        return entry
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.incr(f"gen:{namespace}")
+            self.invalidations += 1
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = self.misses = self.invalidations = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            **self.backend.stats()
+        }
+
+
+class ResponseCacheMiddleware:
+    """ASGI-middleware: отдаёт GET из CACHED_ROUTES из кэша (ETag / 304,
+    Cache-Control) и кэширует их успешные ответы."""
+
+    def __init__(self, app, cache=None, routes=None):
+        self.app = app
+        self.cache = cache or response_cache
+        self.routes = routes or CACHED_ROUTES
+
+    async def __call__(self, scope, receive, send):
+        namespace = self.routes.get(scope.get("path")) if scope["type"] == "http" else None
+        if namespace is None or scope["method"] != "GET" or not self.cache.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        key = self.cache.key(namespace, scope["query_string"])
+        entry = self.cache.get(key)
+        if entry is None:
+            start, chunks = {}, []
+
+            async def capture(message):
+                if message["type"] == "http.response.start":
+                    start.update(message)
+                else:
+                    chunks.append(message.get("body", b""))
+
+            await self.app(scope, receive, capture)
+            if start["status"] != 200:
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(chunks)})
+                return
+            headers = [(k, v) for k, v in start["headers"] if k in STORED_HEADERS]
+            entry = self.cache.put(key, headers, b"".join(chunks))
+            await self._send(scope, send, entry, b"MISS")
+        else:
+            await self._send(scope, send, entry, b"HIT")
+
+    async def _send(self, scope, send, entry, outcome):
+        stored, body, etag = entry
+        headers = [
+            (b"etag", etag),
+            (b"cache-control", b"public, max-age=%d" % self.cache.ttl),
+            (b"x-cache", outcome),
+        ]
+        if_none_match = dict(scope["headers"]).get(b"if-none-match", b"")
+        if etag in [tag.strip() for tag in if_none_match.split(b",")] or if_none_match.strip() == b"*":
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers += list(stored) + [(b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+response_cache = ResponseCache(
+    MemoryBackend(settings.response_cache_max_entries),
+    settings.response_cache_ttl
+)
@@ -0,0 +1,166 @@
+# room_calendar.py
+import datetime
+import threading
+import time
+
+from models import Booking, Room
+from settings import settings
+
+DEFAULT_DAYS = 31
+MAX_DAYS = 731
+
+
+def booked_nights(start, end):
+    """Ночи брони как [первая, последняя + 1) в ordinal-датах.
+
+    Ночь - дата заезда; дата выезда не занята. Бронь внутри одного дня
+    занимает этот день.
+    """
+    first = start.date().toordinal()
+    last = end.date().toordinal()
+    return first, max(last, first + 1)
+
+
+class RoomCalendar:
+    """Битовая карта занятых ночей номера: бит i - ночь origin + i."""
+
+    __slots__ = ("origin", "bits", "ranges", "loaded_at")
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.bits = 0
+        self.ranges = {}
+        self.loaded_at = time.monotonic()
+
+    def _mark(self, first, last):
+        if first < self.origin:
+            self.bits <<= self.origin - first
+            self.origin = first
+        self.bits |= ((1 << (last - first)) - 1) << (first - self.origin)
+
+    def add(self, booking_id, start, end):
+        first, last = booked_nights(start, end)
+        self.ranges[booking_id] = (first, last)
+        self._mark(first, last)
+
+    def remove(self, booking_id):
+        span = self.ranges.pop(booking_id, None)
+        if span is None:
+            return
+        first, last = span
+        if first >= self.origin:
+            self.bits &= ~(((1 << (last - first)) - 1) << (first - self.origin))
+        # Ночь могла быть занята и соседней бронью (заезд в день выезда)
+        for other_first, other_last in self.ranges.values():
+            if other_first < last and other_last > first:
+                self._mark(other_first, other_last)
+
+    def window(self, first, last):
+        """Биты ночей [first, last) как int; бит 0 - ночь first."""
+        shift = first - self.origin
+        bits = self.bits >> shift if shift >= 0 else self.bits << -shift
+        return bits & ((1 << (last - first)) - 1)
+
+
+class CalendarIndex:
+    """In-process календари занятости, поддерживаются book_room / cancel_booking.
+
+    Номер загружается из БД (все незакончившиеся брони), дальше календарь
+    на любой период отдаётся из памяти. Брони и отмены других воркеров
+    сюда не попадают, поэтому календарь старше max_age перечитывается.
+    Загрузки идут по одной; add/remove, пришедшие во время чтения из БД,
+    запоминаются и применяются к загруженному календарю.
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self._rooms = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _load(self, db, room_ids):
+        with self._load_lock:
+            with self._lock:
+                for room_id in room_ids:
+                    self._pending[room_id] = []
+            try:
+                today = datetime.date.today()
+                existing = [room_id for (room_id,) in db.query(Room.id).filter(Room.id.in_(room_ids))]
+                calendars = {room_id: RoomCalendar(today.toordinal()) for room_id in existing}
+                if calendars:
+                    rows = db.query(Booking.id, Booking.room_id, Booking.start_date, Booking.end_date).filter(
+                        Booking.room_id.in_(calendars),
+                        Booking.end_date > datetime.datetime.combine(today, datetime.time.min)
+                    )
+                    for booking_id, room_id, start, end in rows:
+                        calendars[room_id].add(booking_id, start, end)
+                with self._lock:
+                    for room_id in room_ids:
+                        calendar = calendars.get(room_id)
+                        if calendar is None:
+                            # Номер удалён
+                            self._rooms.pop(room_id, None)
+                            continue
+                        # add/remove идемпотентны: повтор уже прочитанного безопасен
+                        for op, args in self._pending[room_id]:
+                            getattr(calendar, op)(*args)
+                        self._rooms[room_id] = calendar
+            finally:
+                with self._lock:
+                    for room_id in room_ids:
+                        self._pending.pop(room_id, None)
+
+    def get_many(self, db, room_ids, date_from, date_to):
+        """{room_id: int-маска занятых ночей [date_from, date_to)}; несуществующие номера пропускаются."""
+        now = time.monotonic()
+        with self._lock:
+            missing = [
+                room_id for room_id in room_ids
+                if room_id not in self._rooms or now - self._rooms[room_id].loaded_at > self.max_age
+            ]
+        if missing:
+            self._load(db, missing)
+        first, last = date_from.toordinal(), date_to.toordinal()
+        with self._lock:
+            return {
+                room_id: self._rooms[room_id].window(first, last)
+                for room_id in room_ids if room_id in self._rooms
+            }
+
+    def add(self, room_id, booking_id, start, end):
+        self._apply(room_id, "add", (booking_id, start, end))
+
+    def remove(self, room_id, booking_id):
+        self._apply(room_id, "remove", (booking_id,))
+
+    def _apply(self, room_id, op, args):
+        with self._lock:
+            pending = self._pending.get(room_id)
+            if pending is not None:
+                pending.append((op, args))
+            calendar = self._rooms.get(room_id)
+            if calendar is not None:
+                getattr(calendar, op)(*args)
+
+    def invalidate(self, room_id=None):
+        with self._lock:
+            if room_id is None:
+                self._rooms.clear()
+            else:
+                self._rooms.pop(room_id, None)
+
+
+def calendar_response(room_id, date_from, date_to, mask):
+    days = date_to.toordinal() - date_from.toordinal()
+    return {
+        "room_id": room_id,
+        "from": date_from,
+        "to": date_to,
+        # Символ на ночь: "1" - занято, "0" - свободно
+        "booked": format(mask, f"0{days}b")[::-1] if days else "",
+        "free_nights": days - bin(mask).count("1")
+    }
+
+
+calendar_index = CalendarIndex(settings.calendar_max_age_seconds)
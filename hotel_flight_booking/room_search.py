@@ -0,0 +1,68 @@
+# room_search.py
+import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import exists, select
+
+from models import Booking, Hotel, Room
+from room_calendar import DEFAULT_DAYS, MAX_DAYS
+
+
+def room_listing_query(filter):
+    """SELECT для листинга номеров по RoomFilter / RoomSearch.
+
+    Только нужные колонки и имя отеля в одном запросе; для RoomSearch
+    добавляются город и anti-join с пересекающимися бронями.
+    """
+    # Метки колонок совпадают с ключами ответа (room_out)
+    query = select(
+        Room.id, Hotel.name.label("hotel"), Room.room_type.label("type"), Room.price, Room.capacity
+    ).join(Hotel).where(Room.available == True)
+    if filter.hotel_id:
+        query = query.where(Room.hotel_id == filter.hotel_id)
+    if filter.room_type:
+        query = query.where(Room.room_type == filter.room_type)
+    if filter.min_price:
+        query = query.where(Room.price >= filter.min_price)
+    if filter.max_price:
+        query = query.where(Room.price <= filter.max_price)
+    if filter.capacity:
+        query = query.where(Room.capacity >= filter.capacity)
+    if getattr(filter, "city", None):
+        query = query.where(Hotel.city == filter.city)
+    if getattr(filter, "start_date", None):
+        query = query.where(~exists().where(
+            Booking.room_id == Room.id,
+            Booking.start_date < filter.end_date,
+            Booking.end_date > filter.start_date
+        ))
+    return query
+
+
+def check_search_dates(search):
+    # Query-параметры через Depends() - ошибка валидатора схемы дала бы 500
+    if search.end_date <= search.start_date:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    return search
+
+
+def calendar_range(date_from=None, date_to=None):
+    date_from = date_from or datetime.date.today()
+    date_to = date_to or date_from + datetime.timedelta(days=DEFAULT_DAYS)
+    if not 0 < (date_to - date_from).days <= MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Calendar range must be between 1 and {MAX_DAYS} days")
+    return date_from, date_to
+
+
+def room_listing_keys(filter):
+    return [(Room.price, False), (Room.id, False)] if filter.sort_by_price else [(Room.id, False)]
+
+
+def room_out(row):
+    return {
+        "id": row.id,
+        "hotel": row.hotel,
+        "type": row.type,
+        "price": row.price,
+        "capacity": row.capacity
+    }
@@ -0,0 +1,229 @@
+# route_search.py
+import bisect
+import datetime
+import heapq
+import threading
+import time
+
+from models import Flight
+
+MIN_CONNECTION = datetime.timedelta(minutes=45)
+MAX_LAYOVER = datetime.timedelta(hours=24)
+MAX_CONNECTIONS = 2
+GRAPH_TTL_SECONDS = 60
+MAX_EXPANSIONS = 200_000
+# Поиск без даты рассматривает первые вылеты не дальше этого горизонта
+UNDATED_HORIZON = datetime.timedelta(days=7)
+
+
+class Leg:
+    __slots__ = ("id", "from_city", "to_city", "departure", "arrival", "price", "available")
+
+    def __init__(self, id, from_city, to_city, departure, arrival, price, available):
+        self.id = id
+        self.from_city = from_city
+        self.to_city = to_city
+        self.departure = departure
+        self.arrival = arrival
+        self.price = price
+        self.available = available
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "from": self.from_city,
+            "to": self.to_city,
+            "departure": self.departure,
+            "arrival": self.arrival,
+            "price": self.price,
+            "available": self.available
+        }
+
+
+class Departures:
+    """Рейсы из одного города (или по одной паре городов), отсортированные по вылету."""
+
+    __slots__ = ("times", "legs")
+
+    def __init__(self):
+        self.times = []
+        self.legs = []
+
+    def append(self, leg):
+        self.times.append(leg.departure)
+        self.legs.append(leg)
+
+    def window(self, earliest, latest):
+        i = bisect.bisect_left(self.times, earliest)
+        j = bisect.bisect_right(self.times, latest)
+        return self.legs[i:j]
+
+    def any_in(self, earliest, latest):
+        i = bisect.bisect_left(self.times, earliest)
+        return i < len(self.times) and self.times[i] <= latest
+
+
+class RouteGraph:
+    """Time-expanded граф рейсов.
+
+    Вершина - рейс, ребро - допустимая пересадка: следующий рейс вылетает
+    из города прилёта не раньше чем через MIN_CONNECTION и не позже чем
+    через MAX_LAYOVER. Рёбра не материализуются: соседи находятся через
+    bisect по отсортированным вылетам города.
+    """
+
+    def __init__(self):
+        self.legs = {}
+        self.by_city = {}
+        self.by_pair = {}
+        self.inbound = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self, db):
+        # Уже вылетевшие рейсы в поиске не участвуют
+        rows = db.query(
+            Flight.id, Flight.from_city, Flight.to_city, Flight.departure,
+            Flight.arrival, Flight.price, Flight.total_seats - Flight.booked_seats
+        ).filter(Flight.departure >= datetime.datetime.now()).order_by(Flight.departure)
+        legs, by_city, by_pair, inbound = {}, {}, {}, {}
+        for row in rows:
+            leg = Leg(*row)
+            legs[leg.id] = leg
+            # Строки уже отсортированы по вылету
+            by_city.setdefault(leg.from_city, Departures()).append(leg)
+            pair = by_pair.get((leg.from_city, leg.to_city))
+            if pair is None:
+                pair = by_pair[leg.from_city, leg.to_city] = Departures()
+                # Город прилёта -> {город вылета: рейсы этой пары}
+                inbound.setdefault(leg.to_city, {})[leg.from_city] = pair
+            pair.append(leg)
+        with self._lock:
+            self.legs, self.by_city, self.by_pair, self.inbound = legs, by_city, by_pair, inbound
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db):
+        loaded_at = self.loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > GRAPH_TTL_SECONDS:
+            self.load(db)
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    def reserve_seats(self, flight_id, passengers):
+        # Под блокировкой: параллельные брони не теряют вычитания, а load не подменяет рейсы посередине
+        with self._lock:
+            leg = self.legs.get(flight_id)
+            if leg is not None:
+                leg.available -= passengers
+
+    def search(self, from_city, to_city, date=None, passengers=1, via_cities=None,
+               max_connections=MAX_CONNECTIONS, sort_by="price", limit=10):
+        """Ограниченный Дейкстра по состояниям (рейс, посещённые via-города, число сегментов).
+
+        Стоимость - суммарная цена или длительность от первого вылета до
+        последнего прилёта; обе не убывают при удлинении маршрута, поэтому
+        маршруты до назначения выходят из кучи уже в порядке стоимости.
+        Сегмент, после которого остаётся одна пересадка, попадает в кучу,
+        только если из его города прилёта есть рейс в to_city в окне пересадки.
+        """
+        max_legs = max_connections + 1
+        via = [c for c in (via_cities or []) if c not in (from_city, to_city)]
+        via_bits = {city: 1 << i for i, city in enumerate(via)}
+        full_mask = (1 << len(via)) - 1
+        # Рейсы в to_city по городу вылета; нет ни одного - маршрута нет
+        final_legs = self.inbound.get(to_city)
+        if len(via) > max_connections or not final_legs:
+            return []
+
+        by_duration = sort_by == "duration"
+
+        def can_finish(leg):
+            # Есть ли рейс в to_city из города прилёта leg в окне пересадки
+            final = final_legs.get(leg.to_city)
+            return final is not None and final.any_in(leg.arrival + MIN_CONNECTION, leg.arrival + MAX_LAYOVER)
+
+        if date is not None:
+            day = datetime.datetime.combine(date.date(), datetime.time.min)
+            first_legs = self.by_city.get(from_city, Departures()).window(day, day + datetime.timedelta(days=1))
+        else:
+            now = datetime.datetime.now()
+            first_legs = self.by_city.get(from_city, Departures()).window(now, now + UNDATED_HORIZON)
+
+        heap = []
+        counter = 0
+        for leg in first_legs:
+            if leg.available < passengers or leg.to_city == from_city:
+                continue
+            if leg.to_city != to_city and (max_legs == 1 or (max_legs == 2 and not can_finish(leg))):
+                continue
+            duration = leg.arrival - leg.departure
+            key = (duration, leg.price) if by_duration else (leg.price, duration)
+            heapq.heappush(heap, (key, counter, (leg,), via_bits.get(leg.to_city, 0), leg.price))
+            counter += 1
+
+        settled = set()
+        results = []
+        expansions = 0
+        while heap and len(results) < limit and expansions < MAX_EXPANSIONS:
+            _, _, path, mask, price = heapq.heappop(heap)
+            last = path[-1]
+            state = (last.id, mask, len(path))
+            if state in settled:
+                continue
+            settled.add(state)
+            expansions += 1
+
+            if last.to_city == to_city:
+                if mask == full_mask:
+                    results.append(self._itinerary(path, passengers))
+                continue
+            if len(path) == max_legs:
+                continue
+
+            visited = {path[0].from_city}
+            visited.update(leg.to_city for leg in path)
+            earliest = last.arrival + MIN_CONNECTION
+            latest = last.arrival + MAX_LAYOVER
+            # Последний сегмент обязан прилететь в пункт назначения
+            if len(path) + 1 == max_legs:
+                candidates = final_legs.get(last.to_city, Departures()).window(earliest, latest)
+            else:
+                candidates = self.by_city.get(last.to_city, Departures()).window(earliest, latest)
+            first_departure = path[0].departure
+            legs_after = max_legs - len(path) - 1
+            for leg in candidates:
+                if leg.available < passengers:
+                    continue
+                if leg.to_city in visited and leg.to_city != to_city:
+                    continue
+                next_mask = mask | via_bits.get(leg.to_city, 0)
+                if leg.to_city == to_city:
+                    if next_mask != full_mask:
+                        continue
+                # Оставшихся сегментов должно хватить на непосещённые via-города и прилёт
+                elif bin(full_mask & ~next_mask).count("1") + 1 > legs_after:
+                    continue
+                elif legs_after == 1 and not can_finish(leg):
+                    continue
+                duration = leg.arrival - first_departure
+                next_price = price + leg.price
+                key = (duration, next_price) if by_duration else (next_price, duration)
+                heapq.heappush(heap, (key, counter, path + (leg,), next_mask, next_price))
+                counter += 1
+        return results
+
+    def _itinerary(self, path, passengers):
+        price = sum(leg.price for leg in path)
+        duration = path[-1].arrival - path[0].departure
+        return {
+            "flights": [leg.to_dict() for leg in path],
+            "connections": len(path) - 1,
+            "price": price,
+            "total_price": price * passengers,
+            "duration_minutes": int(duration.total_seconds() // 60),
+            "available": min(leg.available for leg in path)
+        }
+
+
+route_graph = RouteGraph()
@@ -0,0 +1,91 @@
+# routers/admin.py
+import io
+import os
+import uuid
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Path, Query, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from database import get_db
+from auth import get_current_admin
+from bulk_import import (
+    ErrorFile, after_import, detect_format, error_report_path, import_rows, iter_rows, purge_error_reports
+)
+from bulk_export import MEDIA_TYPES, stream_export
+from response_cache import response_cache
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(get_current_admin)])
+
+MAX_REPORTED_ERRORS = 100
+
+@router.post("/import/{kind}",
+    summary="Bulk import",
+    description="Stream a CSV or NDJSON file of hotels, rooms or flights into the database in chunks. "
+                "The first rejected rows are returned inline; all of them are in errors_file"
+)
+def bulk_import(
+    kind: Literal["hotels", "rooms", "flights"],
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    db: Session = Depends(get_db)
+):
+    errors = []
+    report_id = uuid.uuid4().hex
+    error_file = ErrorFile(error_report_path(report_id))
+
+    def on_error(row_number, record, row_errors):
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "errors": row_errors, "record": record})
+        error_file.write(row_number, record, row_errors)
+
+    purge_error_reports()
+    fmt = format or detect_format(file.filename)
+    lines = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        report = import_rows(db, kind, iter_rows(lines, fmt), on_error=on_error)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    finally:
+        lines.detach()
+        error_file.close()
+        # Часть строк могла быть вставлена и до ошибки
+        after_import(kind)
+    result = {**report.to_dict(), "errors": errors}
+    if error_file.rows:
+        result["errors_file"] = f"/admin/import/errors/{report_id}"
+    return result
+
+@router.get("/import/errors/{report_id}",
+    summary="Rejected import rows",
+    description="NDJSON with every row rejected by a bulk import"
+)
+def import_errors(report_id: str = Path(..., pattern="^[0-9a-f]{32}$")):
+    path = error_report_path(report_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Error report not found or expired")
+    return FileResponse(path, media_type="application/x-ndjson", filename=f"import-errors-{report_id}.ndjson")
+
+@router.get("/export/{kind}",
+    summary="Export bookings",
+    description="Stream all room bookings or flight bookings as NDJSON or CSV (optionally within [from, to))"
+)
+def export_bookings(
+    kind: Literal["bookings", "flight_bookings"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to")
+):
+    # Сессию открывает сам генератор: она должна жить до конца отправки тела
+    return StreamingResponse(
+        stream_export(kind, format, date_from, date_to),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'}
+    )
+
+@router.get("/cache",
+    summary="Response cache stats",
+    description="Hits, misses, hit ratio and size of the public search response cache"
+)
+def cache_stats():
+    return response_cache.stats()
@@ -0,0 +1,169 @@
+# routers/async_bookings.py
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from auth import get_current_user_async
+from models import Booking, Room, User
+from schemas import BookingCreate, BookingByDays, BookingDetails, BookingWithRoom, BookingBatchCreate, BookingBatchResult, MyBookingsFilter
+from batch_booking import book_rooms_batch
+from booking_history import room_bookings_query
+from pagination import page_query, split_page, NEXT_CURSOR_HEADER
+from metrics import bookings_total
+from idempotency import MAX_KEY_LENGTH, request_fingerprint, run_idempotent_async
+from availability import booking_created, booking_cancelled, room_has_conflict
+import datetime
+
+router = APIRouter(prefix="/bookings", tags=["Bookings"])
+
+@router.post("/", response_model=BookingDetails,
+    summary="Book a room",
+    description="Book a room for specific dates"
+)
+async def book_room(
+    booking: BookingCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = current_user.id
+    return await run_idempotent_async(
+        db, user_id, idempotency_key, request_fingerprint("POST /bookings/", booking),
+        lambda commit: _book_room(booking, user_id, db, commit), BookingDetails
+    )
+
+async def _book_room(booking, user_id, db, commit):
+    if booking.start_date >= booking.end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="End date must be after start date"
+        )
+    
+    if booking.start_date < datetime.datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot book in the past"
+        )
+
+    room = (await db.scalars(
+        select(Room).where(Room.id == booking.room_id, Room.available == True)
+    )).first()
+    if not room:
+        bookings_total.inc(("room", "not_found"))
+        raise HTTPException(status_code=404, detail="Room not available")
+
+    conflicting_booking = await db.run_sync(
+        room_has_conflict, booking.room_id, booking.start_date, booking.end_date
+    )
+
+    if conflicting_booking:
+        bookings_total.inc(("room", "conflict"))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Room is already booked for these dates"
+        )
+
+    new_booking = Booking(
+        user_id=user_id,
+        room_id=booking.room_id,
+        start_date=booking.start_date,
+        end_date=booking.end_date
+    )
+    
+    db.add(new_booking)
+    try:
+        await db.flush()
+        await commit(new_booking)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Booking failed"
+        )
+    booking_created(new_booking.room_id, new_booking.id, new_booking.start_date, new_booking.end_date)
+    return new_booking
+
+@router.post("/by-days", response_model=BookingDetails,
+    summary="Book room by days count",
+    description="Book a room for specific number of days"
+)
+async def book_room_by_days(
+    booking: BookingByDays,
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = current_user.id
+    return await run_idempotent_async(
+        db, user_id, idempotency_key, request_fingerprint("POST /bookings/by-days", booking),
+        lambda commit: _book_room_by_days(booking, user_id, db, commit), BookingDetails
+    )
+
+async def _book_room_by_days(booking, user_id, db, commit):
+    if booking.start_date < datetime.datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot book in the past"
+        )
+
+    end_date = booking.start_date + datetime.timedelta(days=booking.num_days)
+    booking_create = BookingCreate(
+        room_id=booking.room_id,
+        start_date=booking.start_date,
+        end_date=end_date
+    )
+    return await _book_room(booking_create, user_id, db, commit)
+
+@router.post("/batch", response_model=BookingBatchResult,
+    summary="Book rooms in batch",
+    description="Book several rooms/dates in one transaction (modes: all_or_nothing, best_effort)"
+)
+async def book_rooms_in_batch(
+    batch: BookingBatchCreate,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(book_rooms_batch, current_user.id, batch.items, batch.mode)
+
+@router.get("/my-bookings", response_model=list[BookingWithRoom],
+    summary="Get user's bookings",
+    description="Bookings of the current user with room and hotel, ordered by start date (cursor pagination, optional upcoming/past filter)"
+)
+async def get_my_bookings(
+    response: Response,
+    filter: MyBookingsFilter = Depends(),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query, keys = room_bookings_query(current_user.id, filter.when)
+    bookings = (await db.scalars(page_query(query, keys, filter.limit, filter.cursor))).all()
+    bookings, next_cursor = split_page(bookings, keys, filter.limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return bookings
+
+@router.delete("/{booking_id}",
+    summary="Cancel booking",
+    description="Cancel a booking (users can cancel only their own, admins can cancel any)"
+)
+async def cancel_booking(
+    booking_id: int,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    booking = await db.get(Booking, booking_id)
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+
+    if current_user.role != "admin" and booking.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="No permission to cancel this booking")
+
+    room = await db.get(Room, booking.room_id)
+    if room:
+        room.available = True
+    
+    await db.delete(booking)
+    await db.commit()
+    booking_cancelled(booking.room_id, booking.id)
+    return {"msg": "Booking cancelled"}
@@ -0,0 +1,125 @@
+# routers/async_flights.py
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from datetime import datetime
+from database import get_async_db
+from models import Flight, FlightBooking, User
+from schemas import FlightCreate, FlightBookingCreate, FlightBookingWithFlight, FlightSearchOut, MyBookingsFilter
+from auth import get_current_admin_async, get_current_user_async
+from route_search import route_graph, MAX_CONNECTIONS
+from response_cache import response_cache
+from metrics import bookings_total
+from idempotency import MAX_KEY_LENGTH, request_fingerprint, run_idempotent_async
+from booking_history import flight_bookings_query, flight_booking_keys
+from pagination import page_query, split_page, NEXT_CURSOR_HEADER
+from seat_reservation import reserve_seats, failure_status
+from seat_inventory import seat_inventory
+
+router = APIRouter(prefix="/flights", tags=["Flights"])
+
+@router.get("/", response_model=list[FlightSearchOut])
+async def search_flights(
+    from_city: str,
+    to_city: str,
+    passengers: int = 1,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Простой поиск рейсов: свободные места - из seat_inventory"""
+    route = seat_inventory.get(from_city, to_city) or await db.run_sync(seat_inventory.load, from_city, to_city)
+    return route.search(passengers)
+
+@router.get("/routes")
+async def search_routes(
+    from_city: str,
+    to_city: str,
+    date: Optional[datetime] = None,
+    passengers: int = Query(1, ge=1),
+    via_cities: Optional[List[str]] = Query(None),
+    max_connections: int = Query(MAX_CONNECTIONS, ge=0, le=MAX_CONNECTIONS),
+    sort_by: Literal["price", "duration"] = "price",
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Поиск маршрутов с пересадками (до двух)"""
+    await db.run_sync(route_graph.ensure_loaded)
+    return route_graph.search(
+        from_city, to_city,
+        date=date,
+        passengers=passengers,
+        via_cities=via_cities,
+        max_connections=max_connections,
+        sort_by=sort_by,
+        limit=limit
+    )
+
+@router.post("/", dependencies=[Depends(get_current_admin_async)])
+async def create_flight(flight: FlightCreate, db: AsyncSession = Depends(get_async_db)):
+    db_flight = Flight(**flight.dict())
+    db.add(db_flight)
+    await db.commit()
+    await db.refresh(db_flight)
+    route_graph.invalidate()
+    seat_inventory.invalidate(db_flight.from_city, db_flight.to_city)
+    response_cache.invalidate("flights")
+    return db_flight
+
+@router.post("/book")
+async def book_flight(
+    booking: FlightBookingCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Бронирование рейса: все сегменты резервируются одним условным UPDATE.
+    Повтор с тем же Idempotency-Key возвращает сохранённый ответ, места не резервируются заново"""
+    user_id = current_user.id
+    return await run_idempotent_async(
+        db, user_id, idempotency_key, request_fingerprint("POST /flights/book", booking),
+        lambda commit: _book_flight(booking, user_id, db, commit)
+    )
+
+async def _book_flight(booking, user_id, db, commit):
+    failures = await db.run_sync(reserve_seats, booking.flight_ids, booking.passengers)
+    if failures:
+        status_code = failure_status(failures)
+        bookings_total.inc(("flight", "not_found" if status_code == 404 else "conflict"))
+        seat_inventory.set_available({f["flight_id"]: f["available"] for f in failures if "available" in f})
+        raise HTTPException(
+            status_code=status_code,
+            detail={"msg": "Some flights cannot be booked", "legs": failures}
+        )
+
+    booking_date = datetime.now()
+    db.add_all([
+        FlightBooking(
+            user_id=user_id,
+            flight_id=flight_id,
+            passengers=booking.passengers,
+            booking_date=booking_date
+        )
+        for flight_id in booking.flight_ids
+    ])
+    result = {"msg": "Flight booked successfully"}
+    await commit(result)
+    for flight_id in booking.flight_ids:
+        route_graph.reserve_seats(flight_id, booking.passengers)
+    seat_inventory.reserve(booking.flight_ids, booking.passengers)
+    response_cache.invalidate("flights")
+    bookings_total.inc(("flight", "booked"))
+    return result
+
+@router.get("/my-bookings", response_model=list[FlightBookingWithFlight])
+async def get_my_flight_bookings(
+    response: Response,
+    filter: MyBookingsFilter = Depends(),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Брони рейсов пользователя с данными рейса, по дате вылета"""
+    query, keys = flight_bookings_query(current_user.id, filter.when)
+    bookings = (await db.scalars(page_query(query, keys, filter.limit, filter.cursor))).all()
+    bookings, next_cursor = split_page(bookings, keys, filter.limit, flight_booking_keys)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return bookings
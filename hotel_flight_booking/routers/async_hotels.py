@@ -0,0 +1,136 @@
+# routers/async_hotels.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from datetime import date
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from models import Hotel, Room
+from schemas import HotelFilter, RoomFilter, RoomSearch, HotelCreate, RoomCreate, HotelOut, RoomOut
+from auth import get_current_admin_async
+from room_calendar import calendar_index, calendar_response
+from response_cache import response_cache
+from pagination import page_query, split_page, NEXT_CURSOR_HEADER
+from room_search import calendar_range, check_search_dates, room_listing_query, room_listing_keys, room_out
+
+router = APIRouter(prefix="/hotels", tags=["Hotels"])
+
+@router.get("/", response_model=list[dict])
+async def get_hotels(response: Response, filter: HotelFilter = Depends(), db: AsyncSession = Depends(get_async_db)):
+    query = select(Hotel)
+    if filter.city:
+        query = query.where(Hotel.city == filter.city)
+    if filter.stars:
+        query = query.where(Hotel.stars == filter.stars)
+    # Порядок совпадает с ix_hotels_city_stars_id (city, stars DESC, id)
+    keys = [(Hotel.stars, True), (Hotel.id, False)] if filter.sort_by_stars else [(Hotel.id, False)]
+    hotels = (await db.scalars(page_query(query, keys, filter.limit, filter.cursor))).all()
+    hotels, next_cursor = split_page(hotels, keys, filter.limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [{"id": h.id, "name": h.name, "city": h.city, "stars": h.stars} for h in hotels]
+
+@router.post("/", response_model=HotelOut, dependencies=[Depends(get_current_admin_async)])
+async def create_hotel(hotel: HotelCreate, db: AsyncSession = Depends(get_async_db)):
+    db_hotel = Hotel(**hotel.dict())
+    db.add(db_hotel)
+    await db.commit()
+    await db.refresh(db_hotel)
+    response_cache.invalidate("hotels", "rooms")
+    return db_hotel
+
+@router.put("/{hotel_id}", response_model=HotelOut, dependencies=[Depends(get_current_admin_async)])
+async def update_hotel(hotel_id: int, hotel_update: HotelCreate, db: AsyncSession = Depends(get_async_db)):
+    db_hotel = await db.get(Hotel, hotel_id)
+    if not db_hotel:
+        raise HTTPException(status_code=404, detail="Hotel not found")
+    for key, value in hotel_update.dict().items():
+        setattr(db_hotel, key, value)
+    await db.commit()
+    await db.refresh(db_hotel)
+    response_cache.invalidate("hotels", "rooms")
+    return db_hotel
+
+@router.delete("/{hotel_id}", dependencies=[Depends(get_current_admin_async)])
+async def delete_hotel(hotel_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_hotel = await db.get(Hotel, hotel_id)
+    if not db_hotel:
+        raise HTTPException(status_code=404, detail="Hotel not found")
+    await db.delete(db_hotel)
+    await db.commit()
+    response_cache.invalidate("hotels", "rooms")
+    return {"msg": "Hotel deleted"}
+
+async def _list_rooms(response, filter, db):
+    keys = room_listing_keys(filter)
+    rows = (await db.execute(page_query(room_listing_query(filter), keys, filter.limit, filter.cursor))).all()
+    rows, next_cursor = split_page(rows, keys, filter.limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [room_out(r) for r in rows]
+
+@router.get("/rooms", response_model=list[dict])
+async def get_rooms(response: Response, filter: RoomFilter = Depends(), db: AsyncSession = Depends(get_async_db)):
+    return await _list_rooms(response, filter, db)
+
+@router.get("/rooms/free", response_model=list[dict])
+async def search_free_rooms(response: Response, search: RoomSearch = Depends(), db: AsyncSession = Depends(get_async_db)):
+    """Номера, свободные на [start_date, end_date): фильтры RoomFilter + город + anti-join с бронями"""
+    return await _list_rooms(response, check_search_dates(search), db)
+
+@router.get("/rooms/{room_id}/calendar")
+async def get_room_calendar(
+    room_id: int,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    date_from, date_to = calendar_range(date_from, date_to)
+    masks = await db.run_sync(calendar_index.get_many, [room_id], date_from, date_to)
+    if room_id not in masks:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return calendar_response(room_id, date_from, date_to, masks[room_id])
+
+@router.get("/{hotel_id}/calendar")
+async def get_hotel_calendar(
+    hotel_id: int,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    date_from, date_to = calendar_range(date_from, date_to)
+    room_ids = (await db.scalars(select(Room.id).where(Room.hotel_id == hotel_id).order_by(Room.id))).all()
+    masks = await db.run_sync(calendar_index.get_many, room_ids, date_from, date_to)
+    return [calendar_response(room_id, date_from, date_to, mask) for room_id, mask in masks.items()]
+
+@router.post("/rooms", response_model=RoomOut, dependencies=[Depends(get_current_admin_async)])
+async def create_room(room: RoomCreate, db: AsyncSession = Depends(get_async_db)):
+    db_room = Room(**room.dict())
+    db.add(db_room)
+    await db.commit()
+    await db.refresh(db_room)
+    response_cache.invalidate("rooms")
+    return db_room
+
+@router.put("/rooms/{room_id}", response_model=RoomOut, dependencies=[Depends(get_current_admin_async)])
+async def update_room(room_id: int, room_update: RoomCreate, db: AsyncSession = Depends(get_async_db)):
+    db_room = await db.get(Room, room_id)
+    if not db_room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    for key, value in room_update.dict().items():
+        setattr(db_room, key, value)
+    await db.commit()
+    await db.refresh(db_room)
+    response_cache.invalidate("rooms")
+    return db_room
+
+@router.delete("/rooms/{room_id}", dependencies=[Depends(get_current_admin_async)])
+async def delete_room(room_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_room = await db.get(Room, room_id)
+    if not db_room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    await db.delete(db_room)
+    await db.commit()
+    calendar_index.invalidate(room_id)
+    response_cache.invalidate("rooms")
+    return {"msg": "Room deleted"}
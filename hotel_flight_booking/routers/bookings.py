@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from database import get_db
 from auth import get_current_user, get_current_admin
 from models import Booking, Room, User
-from schemas import BookingCreate, BookingByDays, BookingDetails
+from schemas import BookingCreate, BookingByDays, BookingDetails, BookingWithRoom, BookingBatchCreate, BookingBatchResult, MyBookingsFilter
+from batch_booking import book_rooms_batch
+from booking_history import room_bookings_query
+from pagination import page_query, split_page, NEXT_CURSOR_HEADER
+from availability import booking_created, booking_cancelled, room_has_conflict
+from metrics import bookings_total
+from idempotency import MAX_KEY_LENGTH, request_fingerprint, run_idempotent
 import datetime
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
@@ -14,9 +21,17 @@ router = APIRouter(prefix="/bookings", tags=["Bookings"])
 )
 def book_room(
     booking: BookingCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    user_id = current_user.id
+    return run_idempotent(
+        db, user_id, idempotency_key, request_fingerprint("POST /bookings/", booking),
+        lambda commit: _book_room(booking, user_id, db, commit), BookingDetails
+    )
+
+def _book_room(booking, user_id, db, commit):
     if booking.start_date >= booking.end_date:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,22 +46,21 @@ def book_room(
 
     room = db.query(Room).filter(Room.id == booking.room_id, Room.available == True).first()
     if not room:
+        bookings_total.inc(("room", "not_found"))
         raise HTTPException(status_code=404, detail="Room not available")
 
-    conflicting_booking = db.query(Booking).filter(
-        Booking.room_id == booking.room_id,
-        Booking.start_date < booking.end_date,
-        Booking.end_date > booking.start_date
-    ).first()
-    
+    # Занятость - из индекса; "свободно" перед вставкой проверяется в БД
+    conflicting_booking = room_has_conflict(db, booking.room_id, booking.start_date, booking.end_date)
+
     if conflicting_booking:
+        bookings_total.inc(("room", "conflict"))
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Room is already booked for these dates"
         )
 
     new_booking = Booking(
-        user_id=current_user.id,
+        user_id=user_id,
         room_id=booking.room_id,
         start_date=booking.start_date,
         end_date=booking.end_date
@@ -54,15 +68,16 @@ def book_room(
     
     db.add(new_booking)
     try:
-        db.commit()
-        db.refresh(new_booking)
-        return new_booking
+        db.flush()
+        commit(new_booking)
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Booking failed"
         )
+    booking_created(new_booking.room_id, new_booking.id, new_booking.start_date, new_booking.end_date)
+    return new_booking
 
 @router.post("/by-days", response_model=BookingDetails,
     summary="Book room by days count",
@@ -70,9 +85,17 @@ def book_room(
 )
 def book_room_by_days(
     booking: BookingByDays,
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    user_id = current_user.id
+    return run_idempotent(
+        db, user_id, idempotency_key, request_fingerprint("POST /bookings/by-days", booking),
+        lambda commit: _book_room_by_days(booking, user_id, db, commit), BookingDetails
+    )
+
+def _book_room_by_days(booking, user_id, db, commit):
     if booking.start_date < datetime.datetime.now():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -85,17 +108,34 @@ def book_room_by_days(
         start_date=booking.start_date,
         end_date=end_date
     )
-    return book_room(booking_create, current_user, db)
+    return _book_room(booking_create, user_id, db, commit)
+
+@router.post("/batch", response_model=BookingBatchResult,
+    summary="Book rooms in batch",
+    description="Book several rooms/dates in one transaction (modes: all_or_nothing, best_effort)"
+)
+def book_rooms_in_batch(
+    batch: BookingBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return book_rooms_batch(db, current_user.id, batch.items, batch.mode)
 
-@router.get("/my-bookings", response_model=list[BookingDetails],
+@router.get("/my-bookings", response_model=list[BookingWithRoom],
     summary="Get user's bookings",
-    description="Get all bookings for current user"
+    description="Bookings of the current user with room and hotel, ordered by start date (cursor pagination, optional upcoming/past filter)"
 )
 def get_my_bookings(
+    response: Response,
+    filter: MyBookingsFilter = Depends(),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    bookings = db.query(Booking).filter(Booking.user_id == current_user.id).all()
+    query, keys = room_bookings_query(current_user.id, filter.when)
+    bookings = db.scalars(page_query(query, keys, filter.limit, filter.cursor)).all()
+    bookings, next_cursor = split_page(bookings, keys, filter.limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return bookings
 
 @router.delete("/{booking_id}",
@@ -120,4 +160,5 @@ def cancel_booking(
     
     db.delete(booking)
     db.commit()
+    booking_cancelled(booking.room_id, booking.id)
     return {"msg": "Booking cancelled"}
\ No newline at end of file
@@ -0,0 +1,18 @@
+# routers/debug.py
+from fastapi import APIRouter, Depends, Query
+from auth import get_current_admin
+from profiling import profile_store
+
+router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(get_current_admin)])
+
+@router.get("/profile",
+    summary="SQL profile per route",
+    description="Statement count and DB time per route plus the most recent request profiles with their slowest statement"
+)
+def get_profile(limit: int = Query(20, ge=1, le=200)):
+    return {"routes": profile_store.routes(), "recent": profile_store.recent(limit)}
+
+@router.delete("/profile", summary="Reset collected profiles")
+def reset_profile():
+    profile_store.clear()
+    return {"msg": "Profiles cleared"}
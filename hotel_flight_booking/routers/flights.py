@@ -1,35 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from datetime import datetime
 from database import get_db
 from models import Flight, FlightBooking, User
-from schemas import FlightCreate, FlightBookingCreate, FlightBookingOut
+from schemas import FlightCreate, FlightBookingCreate, FlightBookingWithFlight, FlightSearchOut, MyBookingsFilter
 from auth import get_current_admin, get_current_user
+from route_search import route_graph, MAX_CONNECTIONS
+from response_cache import response_cache
+from metrics import bookings_total
+from idempotency import MAX_KEY_LENGTH, request_fingerprint, run_idempotent
+from booking_history import flight_bookings_query, flight_booking_keys
+from pagination import page_query, split_page, NEXT_CURSOR_HEADER
+from seat_reservation import reserve_seats, failure_status
+from seat_inventory import seat_inventory
 
 router = APIRouter(prefix="/flights", tags=["Flights"])
 
-@router.get("/")
+@router.get("/", response_model=list[FlightSearchOut])
 def search_flights(
     from_city: str,
     to_city: str,
     passengers: int = 1,
     db: Session = Depends(get_db)
 ):
-    """Простой поиск рейсов"""
-    flights = db.query(Flight).filter(
-        Flight.from_city == from_city,
-        Flight.to_city == to_city,
-        (Flight.total_seats - Flight.booked_seats) >= passengers
-    ).all()
-    
-    return [{
-        "id": f.id,
-        "from": f.from_city,
-        "to": f.to_city, 
-        "departure": f.departure,
-        "arrival": f.arrival,
-        "price": f.price,
-        "available": f.total_seats - f.booked_seats
-    } for f in flights]
+    """Простой поиск рейсов: свободные места - из seat_inventory"""
+    route = seat_inventory.get(from_city, to_city) or seat_inventory.load(db, from_city, to_city)
+    return route.search(passengers)
+
+@router.get("/routes")
+def search_routes(
+    from_city: str,
+    to_city: str,
+    date: Optional[datetime] = None,
+    passengers: int = Query(1, ge=1),
+    via_cities: Optional[List[str]] = Query(None),
+    max_connections: int = Query(MAX_CONNECTIONS, ge=0, le=MAX_CONNECTIONS),
+    sort_by: Literal["price", "duration"] = "price",
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Поиск маршрутов с пересадками (до двух)"""
+    route_graph.ensure_loaded(db)
+    return route_graph.search(
+        from_city, to_city,
+        date=date,
+        passengers=passengers,
+        via_cities=via_cities,
+        max_connections=max_connections,
+        sort_by=sort_by,
+        limit=limit
+    )
 
 @router.post("/", dependencies=[Depends(get_current_admin)])
 def create_flight(flight: FlightCreate, db: Session = Depends(get_db)):
@@ -37,40 +58,67 @@ def create_flight(flight: FlightCreate, db: Session = Depends(get_db)):
     db.add(db_flight)
     db.commit()
     db.refresh(db_flight)
+    route_graph.invalidate()
+    seat_inventory.invalidate(db_flight.from_city, db_flight.to_city)
+    response_cache.invalidate("flights")
     return db_flight
 
 @router.post("/book")
 def book_flight(
     booking: FlightBookingCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Бронирование рейса"""
-    for flight_id in booking.flight_ids:
-        flight = db.query(Flight).filter(Flight.id == flight_id).first()
-        if not flight:
-            raise HTTPException(status_code=404, detail=f"Flight {flight_id} not found")
-        
-        if (flight.total_seats - flight.booked_seats) < booking.passengers:
-            raise HTTPException(status_code=400, detail=f"Not enough seats on flight {flight_id}")
-        
-        flight.booked_seats += booking.passengers
-        flight_booking = FlightBooking(
-            user_id=current_user.id,
+    """Бронирование рейса: все сегменты резервируются одним условным UPDATE.
+    Повтор с тем же Idempotency-Key возвращает сохранённый ответ, места не резервируются заново"""
+    user_id = current_user.id
+    return run_idempotent(
+        db, user_id, idempotency_key, request_fingerprint("POST /flights/book", booking),
+        lambda commit: _book_flight(booking, user_id, db, commit)
+    )
+
+def _book_flight(booking, user_id, db, commit):
+    failures = reserve_seats(db, booking.flight_ids, booking.passengers)
+    if failures:
+        status_code = failure_status(failures)
+        bookings_total.inc(("flight", "not_found" if status_code == 404 else "conflict"))
+        seat_inventory.set_available({f["flight_id"]: f["available"] for f in failures if "available" in f})
+        raise HTTPException(
+            status_code=status_code,
+            detail={"msg": "Some flights cannot be booked", "legs": failures}
+        )
+
+    booking_date = datetime.now()
+    db.add_all([
+        FlightBooking(
+            user_id=user_id,
             flight_id=flight_id,
-            passengers=booking.passengers
+            passengers=booking.passengers,
+            booking_date=booking_date
         )
-        db.add(flight_booking)
-    
-    db.commit()
-    return {"msg": "Flight booked successfully"}
+        for flight_id in booking.flight_ids
+    ])
+    result = {"msg": "Flight booked successfully"}
+    commit(result)
+    for flight_id in booking.flight_ids:
+        route_graph.reserve_seats(flight_id, booking.passengers)
+    seat_inventory.reserve(booking.flight_ids, booking.passengers)
+    response_cache.invalidate("flights")
+    bookings_total.inc(("flight", "booked"))
+    return result
 
-@router.get("/my-bookings", response_model=list[FlightBookingOut])
+@router.get("/my-bookings", response_model=list[FlightBookingWithFlight])
 def get_my_flight_bookings(
+    response: Response,
+    filter: MyBookingsFilter = Depends(),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    bookings = db.query(FlightBooking).filter(
-        FlightBooking.user_id == current_user.id
-    ).all()
-    return bookings
\ No newline at end of file
+    """Брони рейсов пользователя с данными рейса, по дате вылета"""
+    query, keys = flight_bookings_query(current_user.id, filter.when)
+    bookings = db.scalars(page_query(query, keys, filter.limit, filter.cursor)).all()
+    bookings, next_cursor = split_page(bookings, keys, filter.limit, flight_booking_keys)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return bookings
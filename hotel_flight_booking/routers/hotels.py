@@ -1,25 +1,33 @@
 # routers/hotels.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from datetime import date
+from typing import Optional
 from sqlalchemy.orm import Session
 from database import get_db
 from models import Hotel, Room
-from schemas import HotelFilter, RoomFilter, HotelCreate, RoomCreate, HotelOut, RoomOut  # ← Добавлены импорты!
+from schemas import HotelFilter, RoomFilter, RoomSearch, HotelCreate, RoomCreate, HotelOut, RoomOut  # ← Добавлены импорты!
 from auth import get_current_admin
+from room_calendar import calendar_index, calendar_response
+from response_cache import response_cache
+from pagination import paginate, page_query, split_page, NEXT_CURSOR_HEADER
+from room_search import calendar_range, check_search_dates, room_listing_query, room_listing_keys, room_out
 
 from schemas import HotelOut, RoomOut
 
 router = APIRouter(prefix="/hotels", tags=["Hotels"])
 
 @router.get("/", response_model=list[dict])
-def get_hotels(filter: HotelFilter = Depends(), db: Session = Depends(get_db)):
+def get_hotels(response: Response, filter: HotelFilter = Depends(), db: Session = Depends(get_db)):
     query = db.query(Hotel)
     if filter.city:
         query = query.filter(Hotel.city == filter.city)
     if filter.stars:
         query = query.filter(Hotel.stars == filter.stars)
-    hotels = query.all()
-    if filter.sort_by_stars:
-        hotels = sorted(hotels, key=lambda h: h.stars, reverse=True)
+    # Порядок совпадает с ix_hotels_city_stars_id (city, stars DESC, id)
+    keys = [(Hotel.stars, True), (Hotel.id, False)] if filter.sort_by_stars else [(Hotel.id, False)]
+    hotels, next_cursor = paginate(query, keys, filter.limit, filter.cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [{"id": h.id, "name": h.name, "city": h.city, "stars": h.stars} for h in hotels]
 
 @router.post("/", response_model=HotelOut, dependencies=[Depends(get_current_admin)])
@@ -28,6 +36,7 @@ def create_hotel(hotel: HotelCreate, db: Session = Depends(get_db)):
     db.add(db_hotel)
     db.commit()
     db.refresh(db_hotel)
+    response_cache.invalidate("hotels", "rooms")
     return db_hotel
 
 @router.put("/{hotel_id}", response_model=HotelOut, dependencies=[Depends(get_current_admin)])
@@ -39,6 +48,7 @@ def update_hotel(hotel_id: int, hotel_update: HotelCreate, db: Session = Depends
         setattr(db_hotel, key, value)
     db.commit()
     db.refresh(db_hotel)
+    response_cache.invalidate("hotels", "rooms")
     return db_hotel
 
 @router.delete("/{hotel_id}", dependencies=[Depends(get_current_admin)])
@@ -48,31 +58,50 @@ def delete_hotel(hotel_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Hotel not found")
     db.delete(db_hotel)
     db.commit()
+    response_cache.invalidate("hotels", "rooms")
     return {"msg": "Hotel deleted"}
 
+def _list_rooms(response, filter, db):
+    keys = room_listing_keys(filter)
+    rooms = db.execute(page_query(room_listing_query(filter), keys, filter.limit, filter.cursor)).all()
+    rooms, next_cursor = split_page(rooms, keys, filter.limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [room_out(r) for r in rooms]
+
 @router.get("/rooms", response_model=list[dict])
-def get_rooms(filter: RoomFilter = Depends(), db: Session = Depends(get_db)):
-    query = db.query(Room).join(Hotel).filter(Room.available == True)
-    if filter.hotel_id:
-        query = query.filter(Room.hotel_id == filter.hotel_id)
-    if filter.room_type:
-        query = query.filter(Room.room_type == filter.room_type)
-    if filter.min_price:
-        query = query.filter(Room.price >= filter.min_price)
-    if filter.max_price:
-        query = query.filter(Room.price <= filter.max_price)
-    if filter.capacity:
-        query = query.filter(Room.capacity >= filter.capacity)
-    rooms = query.all()
-    if filter.sort_by_price:
-        rooms = sorted(rooms, key=lambda r: r.price)
-    return [{
-        "id": r.id,
-        "hotel": r.hotel.name,
-        "type": r.room_type,
-        "price": r.price,
-        "capacity": r.capacity
-    } for r in rooms]
+def get_rooms(response: Response, filter: RoomFilter = Depends(), db: Session = Depends(get_db)):
+    return _list_rooms(response, filter, db)
+
+@router.get("/rooms/free", response_model=list[dict])
+def search_free_rooms(response: Response, search: RoomSearch = Depends(), db: Session = Depends(get_db)):
+    """Номера, свободные на [start_date, end_date): фильтры RoomFilter + город + anti-join с бронями"""
+    return _list_rooms(response, check_search_dates(search), db)
+
+@router.get("/rooms/{room_id}/calendar")
+def get_room_calendar(
+    room_id: int,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db)
+):
+    date_from, date_to = calendar_range(date_from, date_to)
+    masks = calendar_index.get_many(db, [room_id], date_from, date_to)
+    if room_id not in masks:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return calendar_response(room_id, date_from, date_to, masks[room_id])
+
+@router.get("/{hotel_id}/calendar")
+def get_hotel_calendar(
+    hotel_id: int,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db)
+):
+    date_from, date_to = calendar_range(date_from, date_to)
+    room_ids = [room_id for (room_id,) in db.query(Room.id).filter(Room.hotel_id == hotel_id).order_by(Room.id)]
+    masks = calendar_index.get_many(db, room_ids, date_from, date_to)
+    return [calendar_response(room_id, date_from, date_to, mask) for room_id, mask in masks.items()]
 
 @router.post("/rooms", response_model=RoomOut, dependencies=[Depends(get_current_admin)])
 def create_room(room: RoomCreate, db: Session = Depends(get_db)):
@@ -80,6 +109,7 @@ def create_room(room: RoomCreate, db: Session = Depends(get_db)):
     db.add(db_room)
     db.commit()
     db.refresh(db_room)
+    response_cache.invalidate("rooms")
     return db_room
 
 @router.put("/rooms/{room_id}", response_model=RoomOut, dependencies=[Depends(get_current_admin)])
@@ -91,6 +121,7 @@ def update_room(room_id: int, room_update: RoomCreate, db: Session = Depends(get
         setattr(db_room, key, value)
     db.commit()
     db.refresh(db_room)
+    response_cache.invalidate("rooms")
     return db_room
 
 @router.delete("/rooms/{room_id}", dependencies=[Depends(get_current_admin)])
@@ -100,4 +131,6 @@ def delete_room(room_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Room not found")
     db.delete(db_room)
     db.commit()
+    calendar_index.invalidate(room_id)
+    response_cache.invalidate("rooms")
     return {"msg": "Room deleted"}
\ No newline at end of file
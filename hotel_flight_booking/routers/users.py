@@ -1,21 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from auth import create_access_token, get_password_hash, verify_password, get_current_admin, get_current_user, oauth2_scheme
+from starlette.concurrency import run_in_threadpool
+from auth import create_access_token, get_current_admin, get_current_user, oauth2_scheme
 from database import get_db
 from models import User
 from schemas import UserCreate, UserUpdate, UserOut, Token
+from principal_cache import principal_cache
+from password_hashing import password_hasher
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+def _get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _save_user(db: Session, db_user: User):
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+# Argon2 считается в пуле процессов (password_hashing), а короткие запросы
+# к БД - в threadpool, чтобы хэширование не блокировало event loop.
 @router.post("/register", response_model=UserOut)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
 
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    existing_user = await run_in_threadpool(_get_user_by_email, db, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     
     db_user = User(
         name=user.name, 
@@ -25,18 +39,15 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     if user.email == "admin@example.com":
         db_user.role = "admin"
 
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await run_in_threadpool(_save_user, db, db_user)
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password):
+    user = await run_in_threadpool(_get_user_by_email, db, form_data.username)
+    if not user or not await password_hasher.verify(form_data.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_access_token({"sub": str(user.id)})
@@ -52,6 +63,7 @@ def update_user_name(
         current_user.name = user_update.name
     
     db.commit()
+    principal_cache.invalidate_user(current_user.id)
     db.refresh(current_user)
     return current_user
 
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, validator, EmailStr
+from pydantic import BaseModel, Field, validator, EmailStr
 from datetime import datetime
 from typing import Optional, List
 from enum import Enum
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 class RoomType(str, Enum):
     STANDARD = "standard"
@@ -39,6 +40,8 @@ class HotelFilter(BaseModel):
     city: Optional[str] = None
     stars: Optional[int] = None
     sort_by_stars: bool = False
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
 
 class HotelCreate(BaseModel):
     name: str
@@ -64,6 +67,13 @@ class RoomFilter(BaseModel):
     max_price: Optional[float] = None
     capacity: Optional[int] = None
     sort_by_price: bool = False
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
+class RoomSearch(RoomFilter):
+    city: Optional[str] = None
+    start_date: datetime
+    end_date: datetime
 
 class RoomCreate(BaseModel):
     hotel_id: int
@@ -90,6 +100,15 @@ class RoomOut(RoomCreate):
     class Config:
         from_attributes = True
 
+class BookingPeriod(str, Enum):
+    UPCOMING = "upcoming"
+    PAST = "past"
+
+class MyBookingsFilter(BaseModel):
+    when: Optional[BookingPeriod] = None
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
 class BookingCreate(BaseModel):
     room_id: int
     start_date: datetime
@@ -101,6 +120,20 @@ class BookingCreate(BaseModel):
             raise ValueError('End date must be after start date')
         return v
 
+class BatchMode(str, Enum):
+    ALL_OR_NOTHING = "all_or_nothing"
+    BEST_EFFORT = "best_effort"
+
+class BookingBatchCreate(BaseModel):
+    items: List[BookingCreate]
+    mode: BatchMode = BatchMode.ALL_OR_NOTHING
+
+    @validator('items')
+    def validate_items(cls, v):
+        if not 1 <= len(v) <= 1000:
+            raise ValueError('Batch must contain between 1 and 1000 items')
+        return v
+
 class BookingByDays(BaseModel):
     room_id: int
     start_date: datetime
@@ -154,10 +187,30 @@ class FlightOut(BaseModel):
     class Config:
         from_attributes = True
 
+class FlightSearchOut(BaseModel):
+    id: int
+    from_city: str = Field(alias="from")
+    to_city: str = Field(alias="to")
+    departure: datetime
+    arrival: datetime
+    price: float
+    available: int
+
+    class Config:
+        from_attributes = True
+
 class FlightBookingCreate(BaseModel):
     flight_ids: List[int]
     passengers: int
 
+    @validator('flight_ids')
+    def validate_flight_ids(cls, v):
+        if not v:
+            raise ValueError('At least one flight is required')
+        if len(set(v)) != len(v):
+            raise ValueError('Flight ids must be unique')
+        return v
+
     @validator('passengers')
     def validate_passengers(cls, v):
         if v <= 0:
@@ -174,6 +227,30 @@ class BookingDetails(BaseModel):
     class Config:
         from_attributes = True
 
+class BookingRoomOut(BaseModel):
+    id: int
+    room_type: str
+    price: float
+    capacity: int
+    hotel: HotelOut
+
+    class Config:
+        from_attributes = True
+
+class BookingWithRoom(BookingDetails):
+    room: Optional[BookingRoomOut] = None
+
+class BookingBatchItemResult(BaseModel):
+    index: int
+    status: str
+    booking: Optional[BookingDetails] = None
+    error: Optional[str] = None
+
+class BookingBatchResult(BaseModel):
+    booked: int
+    failed: int
+    items: List[BookingBatchItemResult]
+
 class FlightBookingOut(BaseModel):
     id: int
     user_id: int
@@ -182,4 +259,18 @@ class FlightBookingOut(BaseModel):
     booking_date: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class FlightSummary(BaseModel):
+    id: int
+    from_city: str
+    to_city: str
+    departure: datetime
+    arrival: datetime
+    price: float
+
+    class Config:
+        from_attributes = True
+
+class FlightBookingWithFlight(FlightBookingOut):
+    flight: FlightSummary
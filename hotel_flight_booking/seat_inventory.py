@@ -0,0 +1,189 @@
+# seat_inventory.py
+"""In-process счётчик свободных мест для поиска рейсов (GET /flights/).
+
+Маршрут (пара городов) загружается из БД одним запросом при первом
+поиске; дальше фильтрация по числу пассажиров идёт в памяти. book_flight
+пишет изменения сквозь кэш (reserve), а фоновая сверка (reconcile,
+запускается в lifespan) перечитывает все загруженные маршруты и
+подтягивает брони других воркеров. Маршрут, не сверявшийся дольше
+settings.seat_inventory_max_age_seconds, перечитывается при поиске.
+
+Кэш только для поиска: резервирование мест по-прежнему проверяется
+условным UPDATE в базе (seat_reservation.py).
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import tuple_
+
+from models import Flight
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Пар городов в одном запросе сверки
+RECONCILE_CHUNK = 200
+
+
+def _route_rows(db, pairs):
+    # Колонки с метками под алиасы FlightSearchOut; идёт по ix_flights_route_departure
+    return db.query(
+        Flight.id, Flight.from_city.label("from"), Flight.to_city.label("to"),
+        Flight.departure, Flight.arrival, Flight.price,
+        (Flight.total_seats - Flight.booked_seats).label("available")
+    ).filter(tuple_(Flight.from_city, Flight.to_city).in_(pairs)).order_by(Flight.departure, Flight.id).all()
+
+
+class RouteSeats:
+    """Рейсы одного направления по вылету; available меняется на месте."""
+
+    __slots__ = ("flights", "refreshed_at", "version")
+
+    def __init__(self, flights):
+        self.flights = flights
+        self.refreshed_at = time.monotonic()
+        # Увеличивается при reserve: сверка не затирает более свежие данные
+        self.version = 0
+
+    def search(self, passengers):
+        # Копии: сериализация идёт после выхода из функции
+        return [dict(flight) for flight in self.flights if flight["available"] >= passengers]
+
+
+class SeatInventory:
+    def __init__(self, max_routes, max_age):
+        self.max_routes = max_routes
+        self.max_age = max_age
+        self._routes = OrderedDict()
+        self._by_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, from_city, to_city):
+        """Загруженный и не устаревший маршрут или None."""
+        key = (from_city, to_city)
+        with self._lock:
+            route = self._routes.get(key)
+            if route is not None and time.monotonic() - route.refreshed_at <= self.max_age:
+                self._routes.move_to_end(key)
+                self.hits += 1
+                return route
+            self.misses += 1
+        return None
+
+    def load(self, db, from_city, to_city):
+        """Читает маршрут из БД; при max_routes=0 не кэширует."""
+        route = RouteSeats([dict(row._mapping) for row in _route_rows(db, [(from_city, to_city)])])
+        if self.max_routes:
+            with self._lock:
+                self._install((from_city, to_city), route)
+        return route
+
+    def reserve(self, flight_ids, passengers):
+        """Сквозная запись после успешного book_flight."""
+        with self._lock:
+            for flight_id in flight_ids:
+                self._update(flight_id, lambda flight: flight["available"] - passengers)
+
+    def set_available(self, seats):
+        """{flight_id: свободно} - свежие значения из БД (например, отказы reserve_seats)."""
+        with self._lock:
+            for flight_id, available in seats.items():
+                self._update(flight_id, lambda flight: available)
+
+    def invalidate(self, from_city=None, to_city=None):
+        with self._lock:
+            if from_city is None:
+                self._routes.clear()
+                self._by_flight.clear()
+            else:
+                self._drop((from_city, to_city))
+
+    def reconcile(self, db):
+        """Перечитывает все загруженные маршруты; возвращает число обновлённых."""
+        with self._lock:
+            versions = {key: route.version for key, route in self._routes.items()}
+        refreshed = 0
+        keys = list(versions)
+        for i in range(0, len(keys), RECONCILE_CHUNK):
+            chunk = keys[i:i + RECONCILE_CHUNK]
+            flights = {key: [] for key in chunk}
+            for row in _route_rows(db, chunk):
+                flight = dict(row._mapping)
+                flights[(flight["from"], flight["to"])].append(flight)
+            with self._lock:
+                for key, route_flights in flights.items():
+                    current = self._routes.get(key)
+                    # Вытеснен или после чтения был reserve - сверим в следующий раз
+                    if current is None or current.version != versions[key]:
+                        continue
+                    self._install(key, RouteSeats(route_flights), touch=False)
+                    refreshed += 1
+        return refreshed
+
+    def stats(self):
+        with self._lock:
+            return {"routes": len(self._routes), "flights": len(self._by_flight), "hits": self.hits, "misses": self.misses}
+
+    # Вызываются под self._lock
+    def _install(self, key, route, touch=True):
+        self._drop(key)
+        self._routes[key] = route
+        if touch:
+            self._routes.move_to_end(key)
+        for flight in route.flights:
+            self._by_flight[flight["id"]] = (flight, route)
+        while len(self._routes) > self.max_routes:
+            self._drop(next(iter(self._routes)))
+
+    def _drop(self, key):
+        route = self._routes.pop(key, None)
+        if route is not None:
+            for flight in route.flights:
+                self._by_flight.pop(flight["id"], None)
+
+    def _update(self, flight_id, value):
+        entry = self._by_flight.get(flight_id)
+        if entry is not None:
+            flight, route = entry
+            flight["available"] = value(flight)
+            route.version += 1
+
+
+seat_inventory = SeatInventory(
+    settings.seat_inventory_max_routes if settings.seat_inventory else 0,
+    settings.seat_inventory_max_age_seconds
+)
+
+
+def _reconcile_sync():
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        return seat_inventory.reconcile(db)
+    finally:
+        db.close()
+
+
+async def _reconcile_async():
+    from database import get_async_sessionmaker
+    async with get_async_sessionmaker()() as db:
+        return await db.run_sync(seat_inventory.reconcile)
+
+
+async def run_reconciler(interval, use_async_db=False):
+    """Фоновая сверка с таблицей flights каждые interval секунд (задача lifespan)."""
+    from starlette.concurrency import run_in_threadpool
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if use_async_db:
+                await _reconcile_async()
+            else:
+                await run_in_threadpool(_reconcile_sync)
+        except Exception:
+            logger.exception("Seat inventory reconciliation failed")
@@ -0,0 +1,49 @@
+# seat_reservation.py
+from sqlalchemy import update
+
+from models import Flight
+
+MAX_ATTEMPTS = 3
+
+
+def reserve_seats(db, flight_ids, passengers):
+    """Атомарно резервирует места на всех сегментах маршрута.
+
+    Один условный UPDATE ... WHERE id IN (...) AND свободных мест >= n:
+    проверка и увеличение booked_seats происходят в самой базе, поэтому
+    параллельные брони не теряют обновления. Если обновились не все
+    сегменты, транзакция откатывается и возвращается список отказов
+    по сегментам; пустой список - места зарезервированы (commit за
+    вызывающим кодом).
+    """
+    for _ in range(MAX_ATTEMPTS):
+        result = db.execute(
+            update(Flight)
+            .where(
+                Flight.id.in_(flight_ids),
+                Flight.total_seats - Flight.booked_seats >= passengers
+            )
+            .values(booked_seats=Flight.booked_seats + passengers)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == len(flight_ids):
+            return []
+        db.rollback()
+
+        available = dict(db.query(Flight.id, Flight.total_seats - Flight.booked_seats).filter(
+            Flight.id.in_(flight_ids)
+        ).all())
+        failures = []
+        for flight_id in flight_ids:
+            if flight_id not in available:
+                failures.append({"flight_id": flight_id, "error": "not_found"})
+            elif available[flight_id] < passengers:
+                failures.append({"flight_id": flight_id, "error": "not_enough_seats", "available": available[flight_id]})
+        if failures:
+            return failures
+        # Места освободились между UPDATE и проверкой - пробуем ещё раз
+    return [{"flight_id": flight_id, "error": "not_enough_seats"} for flight_id in flight_ids]
+
+
+def failure_status(failures):
+    return 404 if any(f["error"] == "not_found" for f in failures) else 400
@@ -0,0 +1,83 @@
+# settings.py
+import os
+from pydantic import BaseModel
+
+
+class Settings(BaseModel):
+    """Настройки приложения; каждое поле переопределяется переменной окружения
+    с тем же именем в верхнем регистре (DATABASE_URL, DB_POOL_SIZE, ...)."""
+
+    database_url: str = "sqlite:///./test.db"
+    # По умолчанию выводится из database_url (aiosqlite / asyncpg)
+    async_database_url: str = ""
+    use_async_db: bool = False
+    debug: bool = False
+    # create_all при старте приложения - для локальной разработки; в остальных
+    # случаях схема готовится отдельно: python init_db.py (alembic upgrade head)
+    auto_create_schema: bool = False
+    db_echo: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # 0 - без ограничения; для SQLite не применяется
+    db_statement_timeout_ms: int = 0
+    # Профиль PRAGMA для SQLite, применяется к каждому новому соединению
+    sqlite_tuning: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size: int = -65536  # отрицательное - в КиБ (64 МиБ)
+    sqlite_mmap_size: int = 268435456
+    sqlite_temp_store: str = "MEMORY"
+    # Индекс занятости номеров (проверка пересечений при бронировании) перечитывается
+    # из БД не реже этого - отмены других воркеров
+    availability_max_age_seconds: float = 30.0
+    # Календари занятости номеров перечитываются из БД не реже этого (брони других воркеров)
+    calendar_max_age_seconds: float = 30.0
+    # Кэш ответов публичного поиска (GET /hotels/, /hotels/rooms, /flights/); 0 - выключен
+    response_cache_ttl: int = 30
+    response_cache_max_entries: int = 1024
+    # Профилирование SQL по запросам: Server-Timing, /debug/profile, лог медленных (0 - не логировать)
+    profiling: bool = True
+    profile_history: int = 200
+    slow_request_ms: float = 500.0
+    # GET /metrics и middleware латентности запросов
+    metrics: bool = True
+    # Idempotency-Key: сколько хранится ответ; через сколько незавершённый
+    # запрос (упавший воркер) перестаёт блокировать ключ; период очистки
+    idempotency_ttl_seconds: int = 86400
+    idempotency_lock_timeout_seconds: int = 60
+    idempotency_purge_interval_seconds: int = 300
+    # Кэш свободных мест для GET /flights/: сверка с таблицей flights в фоне
+    # (0 - без фоновой сверки), маршрут старше max_age перечитывается при поиске
+    seat_inventory: bool = True
+    seat_inventory_max_routes: int = 4096
+    seat_inventory_reconcile_seconds: float = 5.0
+    seat_inventory_max_age_seconds: float = 30.0
+    # Отклонённые строки POST /admin/import/{kind} (пусто - во временном каталоге ОС);
+    # каталог должен быть общим для воркеров, файлы старше TTL удаляются
+    import_errors_dir: str = ""
+    import_errors_ttl_seconds: int = 86400
+
+    @classmethod
+    def from_env(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        values = {name: environ[name.upper()] for name in cls.model_fields if name.upper() in environ}
+        return cls(**values)
+
+    def get_async_database_url(self):
+        if self.async_database_url:
+            return self.async_database_url
+        for prefix, async_prefix in (
+            ("sqlite://", "sqlite+aiosqlite://"),
+            ("postgresql://", "postgresql+asyncpg://"),
+            ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ):
+            if self.database_url.startswith(prefix):
+                return async_prefix + self.database_url[len(prefix):]
+        return self.database_url
+
+
+settings = Settings.from_env()
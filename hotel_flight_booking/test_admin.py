@@ -0,0 +1,141 @@
+# test_admin.py
+import csv
+import datetime
+import io
+import json
+
+from sqlalchemy import text
+
+from models import Booking, Hotel, Room
+
+
+def upload(client, headers, kind, name, content, **params):
+    return client.post(f"/admin/import/{kind}", params=params, headers=headers, files={"file": (name, content)})
+
+
+def test_import_hotels_csv_and_rooms_ndjson(client, db, admin_headers):
+    response = upload(client, admin_headers, "hotels", "hotels.csv",
+                      "name,city,stars\nGrand,Moscow,5\nRiver,Paris,3\n")
+    assert response.json() == {"kind": "hotels", "total": 2, "imported": 2, "failed": 0, "chunks": 1, "errors": []}
+    rooms = "\n".join(json.dumps(r) for r in [
+        {"hotel_id": 1, "room_type": "standard", "price": 100, "capacity": 2},
+        {"hotel_id": 2, "room_type": "premium", "price": 250.5, "capacity": 3, "available": False},
+    ])
+    assert upload(client, admin_headers, "rooms", "rooms.ndjson", rooms).json()["imported"] == 2
+    assert [(r.hotel_id, r.room_type, r.available) for r in db.query(Room).order_by(Room.id)] == [
+        (1, "standard", True), (2, "premium", False)
+    ]
+    assert [h["name"] for h in client.get("/hotels/").json()] == ["Grand", "River"]
+    # Брони не импортируются: импорт в обход book_room не проверяет пересечения
+    assert upload(client, admin_headers, "bookings", "bookings.csv", "user_id,room_id\n1,1\n").status_code == 422
+
+
+def test_import_reports_every_rejected_row(client, db, admin_headers, monkeypatch):
+    import routers.admin
+
+    monkeypatch.setattr(routers.admin, "MAX_REPORTED_ERRORS", 2)
+    content = "\n".join([
+        json.dumps({"name": "Grand", "city": "Moscow", "stars": 5}),
+        json.dumps({"name": "Nowhere", "stars": 4}),
+        "{not json",
+        "[1, 2]",
+        json.dumps({"name": "Dim", "city": "Rome", "stars": 9}),
+    ])
+    body = upload(client, admin_headers, "hotels", "hotels.ndjson", content).json()
+    assert (body["total"], body["imported"], body["failed"]) == (5, 1, 4)
+    assert [e["row"] for e in body["errors"]] == [2, 3]
+    assert body["errors"][0]["errors"] == ["city: Field required"]
+
+    # Все отклонённые строки - в файле отчёта, не только первые MAX_REPORTED_ERRORS
+    report = client.get(body["errors_file"], headers=admin_headers)
+    assert report.headers["content-type"] == "application/x-ndjson"
+    rejected = [json.loads(line) for line in report.text.splitlines()]
+    assert [e["row"] for e in rejected] == [2, 3, 4, 5]
+    assert rejected[2]["errors"] == ["Row must be a JSON object"]
+    assert rejected[3]["errors"] == ["stars: Value error, Stars must be between 1 and 5"]
+    assert client.get("/admin/import/errors/" + "0" * 32, headers=admin_headers).status_code == 404
+
+    rooms = upload(client, admin_headers, "rooms", "rooms.csv",
+                   "hotel_id,room_type,price,capacity\n1,standard,100,2\n7,standard,100,2\n1,suite,100,2\n").json()
+    assert (rooms["imported"], rooms["failed"]) == (1, 2)
+    assert {e["row"]: e["errors"][0] for e in rooms["errors"]} == {
+        3: "Hotel 7 not found",
+        4: "room_type: Input should be 'standard', 'large' or 'premium'",
+    }
+
+
+def test_import_retries_chunk_row_by_row_after_database_error(client, db, admin_headers):
+    db.execute(text(
+        "CREATE TRIGGER reject_hotel BEFORE INSERT ON hotels WHEN NEW.name = 'Broken' "
+        "BEGIN SELECT RAISE(ABORT, 'hotel rejected'); END"
+    ))
+    db.commit()
+    body = upload(client, admin_headers, "hotels", "hotels.csv",
+                  "name,city,stars\nGrand,Moscow,5\nBroken,Paris,3\nRiver,Paris,4\n").json()
+    assert (body["imported"], body["failed"]) == (2, 1)
+    assert body["errors"] == [{
+        "row": 3, "errors": ["Database error: hotel rejected"],
+        "record": {"name": "Broken", "city": "Paris", "stars": 3}
+    }]
+    assert [h.name for h in db.query(Hotel).order_by(Hotel.id)] == ["Grand", "River"]
+
+
+def seed_bookings(db, count):
+    from conftest import make_user
+    from test_bookings import seed_room
+
+    seed_room(db)
+    user, _ = make_user(db)
+    start = datetime.datetime(2026, 3, 1, 14)
+    db.add_all([
+        Booking(user_id=user.id, room_id=1 + i % 2, start_date=start + datetime.timedelta(days=i),
+                end_date=start + datetime.timedelta(days=i + 1))
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def test_export_streams_one_chunk_per_partition(db, monkeypatch):
+    import bulk_export
+
+    seed_bookings(db, 7)
+    monkeypatch.setattr(bulk_export, "YIELD_PER", 3)
+    chunks = list(bulk_export.stream_export("bookings", "ndjson"))
+    assert [chunk.count("\n") for chunk in chunks] == [3, 3, 1]
+    rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [r["id"] for r in rows] == list(range(1, 8))
+    assert rows[0] == {"id": 1, "user_id": 1, "room_id": 1,
+                       "start_date": "2026-03-01T14:00:00", "end_date": "2026-03-02T14:00:00"}
+
+    csv_chunks = [chunk for chunk in bulk_export.stream_export("bookings", "csv") if chunk]
+    assert csv_chunks[0].startswith("id,user_id,room_id,start_date,end_date\r\n")
+    assert [chunk.count("\n") for chunk in csv_chunks] == [4, 3, 1]
+
+
+def test_export_bookings_csv_within_window(client, db, admin_headers):
+    seed_bookings(db, 5)
+    params = {"format": "csv", "from": "2026-03-02T00:00:00", "to": "2026-03-05T00:00:00"}
+    response = client.get("/admin/export/bookings", params=params, headers=admin_headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="bookings.csv"'
+    lines = response.text.splitlines()
+    assert len(lines) == 4 and lines[1].startswith("2,2,2,2026-03-02T14:00:00,")
+
+    exported = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(r["id"]) for r in exported] == [2, 3, 4]
+    assert [(int(r["user_id"]), int(r["room_id"]), r["start_date"], r["end_date"]) for r in exported] == [
+        (b.user_id, b.room_id, b.start_date.isoformat(), b.end_date.isoformat())
+        for b in db.query(Booking).filter(Booking.id.in_([2, 3, 4])).order_by(Booking.id)
+    ]
+
+
+def test_export_flight_bookings_ndjson(client, db, admin_headers, user_headers):
+    from test_flights import add_flight
+
+    flight_id = add_flight(db)
+    client.post("/flights/book", json={"flight_ids": [flight_id], "passengers": 2}, headers=user_headers)
+    response = client.get("/admin/export/flight_bookings", headers=admin_headers)
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["flight_id"], r["passengers"]) for r in rows] == [(flight_id, 2)]
+    assert client.get("/admin/export/flight_bookings", headers=user_headers).status_code == 403
@@ -0,0 +1,271 @@
+# test_bookings.py
+import datetime
+
+from idempotency import purge_expired
+from models import Booking, Hotel, IdempotencyKey, Room
+from settings import settings
+
+
+def seed_room(db, rooms=2):
+    hotel = Hotel(name="Grand", city="Moscow", stars=5)
+    db.add(hotel)
+    db.flush()
+    db.add_all([Room(hotel_id=hotel.id, room_type="standard", price=100, capacity=2) for _ in range(rooms)])
+    db.commit()
+
+
+def item(room_id, start_day, end_day):
+    # Не зависит от текущей секунды: одинаковые item() дают одинаковое тело запроса
+    base = datetime.datetime.combine(datetime.date.today(), datetime.time(12)) + datetime.timedelta(days=10)
+    return {
+        "room_id": room_id,
+        "start_date": (base + datetime.timedelta(days=start_day)).isoformat(),
+        "end_date": (base + datetime.timedelta(days=end_day)).isoformat()
+    }
+
+
+def test_batch_best_effort_books_valid_items(client, db, user_headers, statements):
+    seed_room(db)
+    client.post("/bookings/", json=item(1, 0, 2), headers=user_headers)
+    statements.clear()
+    response = client.post("/bookings/batch", headers=user_headers, json={
+        "mode": "best_effort",
+        "items": [item(1, 1, 3), item(1, 5, 6), item(1, 5, 7), item(2, 0, 2), item(99, 0, 1)]
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert [i["status"] for i in body["items"]] == ["failed", "booked", "failed", "booked", "failed"]
+    assert body["booked"] == 2 and body["failed"] == 3
+    assert body["items"][1]["booking"]["room_id"] == 1
+    assert db.query(Booking).count() == 3
+    # Проверки для всей пачки - фиксированное число запросов
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) <= 3
+
+
+def test_batch_all_or_nothing_books_nothing_on_conflict(client, db, user_headers):
+    seed_room(db)
+    response = client.post("/bookings/batch", headers=user_headers, json={
+        "items": [item(1, 0, 2), item(2, 0, 2), item(1, 1, 2)]
+    })
+    body = response.json()
+    assert [i["status"] for i in body["items"]] == ["aborted", "aborted", "failed"]
+    assert body["booked"] == 0
+    assert db.query(Booking).count() == 0
+
+
+def test_room_calendar_tracks_bookings_and_cancellations(client, db, user_headers):
+    seed_room(db)
+    base = (datetime.datetime.now() + datetime.timedelta(days=10)).date()
+    params = {"from": base.isoformat(), "to": (base + datetime.timedelta(days=7)).isoformat()}
+    assert client.get("/hotels/rooms/1/calendar", params=params).json()["booked"] == "0000000"
+
+    first = client.post("/bookings/", json=item(1, 1, 3), headers=user_headers).json()
+    client.post("/bookings/", json=item(1, 3, 4), headers=user_headers)
+    assert client.get("/hotels/rooms/1/calendar", params=params).json()["booked"] == "0111000"
+
+    client.delete(f"/bookings/{first['id']}", headers=user_headers)
+    calendar = client.get("/hotels/rooms/1/calendar", params=params).json()
+    assert calendar["booked"] == "0001000"
+    assert calendar["free_nights"] == 6
+    assert client.get("/hotels/rooms/42/calendar").status_code == 404
+
+
+def test_room_calendar_rereads_bookings_of_other_workers(client, db, user_headers, monkeypatch):
+    from room_calendar import calendar_index
+    from sqlalchemy import event
+    from conftest import engines
+
+    seed_room(db)
+    base = (datetime.datetime.now() + datetime.timedelta(days=10)).date()
+    params = {"from": base.isoformat(), "to": (base + datetime.timedelta(days=4)).isoformat()}
+    assert client.get("/hotels/rooms/1/calendar", params=params).json()["booked"] == "0000"
+
+    # Бронь другого воркера видна после max_age
+    booking = client.post("/bookings/", json=item(1, 0, 1), headers=user_headers).json()
+    db.add(Booking(user_id=booking["user_id"], room_id=1, **{
+        k: datetime.datetime.fromisoformat(v) for k, v in item(1, 2, 3).items() if k != "room_id"
+    }))
+    db.commit()
+    assert client.get("/hotels/rooms/1/calendar", params=params).json()["booked"] == "1000"
+    monkeypatch.setattr(calendar_index, "max_age", 0)
+
+    # Бронь этого воркера во время чтения из БД не теряется
+    start = datetime.datetime.combine(base, datetime.time(14)) + datetime.timedelta(days=3)
+    concurrent = [(1, 999, start, start + datetime.timedelta(days=1))]
+
+    def concurrent_booking(conn, cursor, statement, *args):
+        if "FROM bookings" in statement and concurrent:
+            calendar_index.add(*concurrent.pop())
+
+    for db_engine in engines():
+        event.listen(db_engine, "before_cursor_execute", concurrent_booking)
+    try:
+        assert client.get("/hotels/rooms/1/calendar", params=params).json()["booked"] == "1011"
+    finally:
+        for db_engine in engines():
+            event.remove(db_engine, "before_cursor_execute", concurrent_booking)
+
+
+def test_metrics_count_booking_outcomes_and_latency(client, db, user_headers):
+    from metrics import bookings_total, http_request_duration
+    seed_room(db)
+    booked, conflicts = bookings_total.value(("room", "booked")), bookings_total.value(("room", "conflict"))
+    latency = http_request_duration.count(("POST", "/bookings/", 200))
+
+    assert client.post("/bookings/", json=item(1, 0, 2), headers=user_headers).status_code == 200
+    assert client.post("/bookings/", json=item(1, 1, 3), headers=user_headers).status_code == 400
+    assert bookings_total.value(("room", "booked")) == booked + 1
+    assert bookings_total.value(("room", "conflict")) == conflicts + 1
+    assert http_request_duration.count(("POST", "/bookings/", 200)) == latency + 1
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert f'bookings_total{{kind="room",outcome="booked"}} {booked + 1}' in body
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/bookings/",status="400",le="+Inf"}' in body
+    assert "http_requests_in_flight 1" in body
+    assert "auth_cache_hits_total" in body and "db_pool_checkouts_total" in body
+
+
+def test_my_bookings_paginates_with_room_details_without_n_plus_one(client, db, statements):
+    from conftest import make_user
+    seed_room(db, rooms=3)
+    user, headers = make_user(db)
+    now = datetime.datetime.now().replace(microsecond=0)
+    for day in range(-6, 6):
+        start = now + datetime.timedelta(days=day * 3)
+        db.add(Booking(user_id=user.id, room_id=1 + day % 3, start_date=start, end_date=start + datetime.timedelta(days=2)))
+    db.commit()
+    client.get("/users/me", headers=headers)
+
+    pages, cursor = [], None
+    statements.clear()
+    while True:
+        params = {"when": "upcoming", "limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/bookings/my-bookings", params=params, headers=headers)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    upcoming = [b for page in pages for b in page]
+    assert [len(page) for page in pages] == [4, 2]
+    assert [b["start_date"] for b in upcoming] == sorted(b["start_date"] for b in upcoming)
+    assert upcoming[0]["room"]["hotel"]["name"] == "Grand"
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == len(pages)
+
+    past = client.get("/bookings/my-bookings", params={"when": "past"}, headers=headers).json()
+    assert len(past) == 6
+    assert [b["start_date"] for b in past] == sorted((b["start_date"] for b in past), reverse=True)
+
+
+def test_idempotency_key_replays_stored_response(client, db, user_headers, statements):
+    seed_room(db)
+    headers = {**user_headers, "Idempotency-Key": "retry-1"}
+    first = client.post("/bookings/", json=item(1, 0, 2), headers=headers)
+    assert first.status_code == 200 and "Idempotent-Replayed" not in first.headers
+
+    statements.clear()
+    replay = client.post("/bookings/", json=item(1, 0, 2), headers=headers)
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+    # Повтор не доходит до проверки конфликтов
+    assert not any("FROM bookings" in s for s in statements)
+    assert db.query(Booking).count() == 1
+
+    assert client.post("/bookings/", json=item(1, 3, 4), headers=headers).status_code == 422
+    conflict = {**user_headers, "Idempotency-Key": "retry-2"}
+    assert client.post("/bookings/by-days", headers=conflict, json={
+        "room_id": 1, "start_date": item(1, 1, 2)["start_date"], "num_days": 2
+    }).status_code == 400
+    replayed_conflict = client.post("/bookings/by-days", headers=conflict, json={
+        "room_id": 1, "start_date": item(1, 1, 2)["start_date"], "num_days": 2
+    })
+    assert replayed_conflict.status_code == 400
+    assert replayed_conflict.json() == {"detail": "Room is already booked for these dates"}
+
+
+def test_expired_idempotency_keys_are_purged(db):
+    from conftest import make_user
+
+    user, _ = make_user(db)
+    now = datetime.datetime.now()
+    db.add_all([
+        IdempotencyKey(user_id=user.id, key="old", request_hash="-", status_code=200, response="{}",
+                       created_at=now - datetime.timedelta(seconds=settings.idempotency_ttl_seconds + 1)),
+        IdempotencyKey(user_id=user.id, key="fresh", request_hash="-", status_code=200, response="{}", created_at=now),
+    ])
+    db.commit()
+    assert purge_expired(db, now) == 1
+    assert [k.key for k in db.query(IdempotencyKey)] == ["fresh"]
+
+
+def test_inconsistent_availability_index_falls_back_to_sql(client, db, user_headers):
+    from conftest import make_user
+
+    seed_room(db)
+    user, _ = make_user(db, "other@example.com")
+    base = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=10)
+    # Пересекающиеся брони (например, после гонки воркеров) - интервалы номера неконсистентны
+    db.add_all([
+        Booking(user_id=user.id, room_id=1, start_date=base, end_date=base + datetime.timedelta(days=3)),
+        Booking(user_id=user.id, room_id=1, start_date=base + datetime.timedelta(days=1), end_date=base + datetime.timedelta(days=4)),
+    ])
+    db.commit()
+    assert client.post("/bookings/", json=item(1, 30, 32), headers=user_headers).status_code == 200
+    assert client.post("/bookings/", json=item(1, 2, 3), headers=user_headers).status_code == 400
+
+
+def test_occupied_room_is_answered_by_index_without_sql(client, db, user_headers, statements, monkeypatch):
+    from availability import availability_index
+
+    seed_room(db)
+    booking = client.post("/bookings/", json=item(1, 0, 2), headers=user_headers).json()
+    statements.clear()
+    assert client.post("/bookings/", json=item(1, 1, 2), headers=user_headers).status_code == 400
+    assert not any("FROM bookings" in s for s in statements)
+
+    # Отмена в другом воркере - этот воркер о ней не знает, пока номер не устареет
+    db.query(Booking).filter(Booking.id == booking["id"]).delete()
+    db.commit()
+    assert client.post("/bookings/", json=item(1, 0, 2), headers=user_headers).status_code == 400
+    monkeypatch.setattr(availability_index, "max_age", 0)
+    assert client.post("/bookings/", json=item(1, 0, 2), headers=user_headers).status_code == 200
+
+
+def test_free_answer_is_checked_in_database(client, db, user_headers):
+    from conftest import make_user
+
+    seed_room(db)
+    assert client.post("/bookings/", json=item(1, 5, 6), headers=user_headers).status_code == 200
+    # Бронь другого воркера - индекс её не видит, SQL-проверка перед вставкой ловит
+    user, _ = make_user(db, "other@example.com")
+    start = datetime.datetime.fromisoformat(item(1, 0, 2)["start_date"])
+    db.add(Booking(user_id=user.id, room_id=1, start_date=start, end_date=start + datetime.timedelta(days=2)))
+    db.commit()
+    assert client.post("/bookings/", json=item(1, 1, 2), headers=user_headers).status_code == 400
+    assert db.query(Booking).count() == 2
+
+
+def test_failed_idempotent_commit_leaves_no_booking_and_retry_books_once(client, db, user_headers, monkeypatch):
+    import idempotency
+    from sqlalchemy.exc import OperationalError
+
+    seed_room(db)
+    record_response = idempotency._record_response
+
+    def locked(*args):
+        # Как "database is locked" при записи ответа: откатывается и бронь
+        monkeypatch.setattr(idempotency, "_record_response", record_response)
+        raise OperationalError("UPDATE idempotency_keys", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(idempotency, "_record_response", locked)
+    headers = {**user_headers, "Idempotency-Key": "locked"}
+    assert client.post("/bookings/", json=item(1, 0, 2), headers=headers).status_code == 500
+    assert db.query(Booking).count() == 0
+
+    retry = client.post("/bookings/", json=item(1, 0, 2), headers=headers)
+    assert retry.status_code == 200 and "Idempotent-Replayed" not in retry.headers
+    assert client.post("/bookings/", json=item(1, 0, 2), headers=headers).headers["Idempotent-Replayed"] == "true"
+    assert db.query(Booking).count() == 1
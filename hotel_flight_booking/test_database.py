@@ -0,0 +1,112 @@
+# test_database.py
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+
+from database import (
+    TimedQueuePool, _engine_options, create_db_engine, get_pool_status, pool_stats, sqlite_pragmas
+)
+from settings import Settings
+
+
+def test_settings_from_env_parses_values_and_keeps_defaults():
+    defaults = Settings()
+    assert Settings.from_env({}) == defaults
+    assert defaults.database_url == "sqlite:///./test.db"
+    assert (defaults.db_pool_size, defaults.db_max_overflow, defaults.db_statement_timeout_ms) == (5, 10, 0)
+
+    parsed = Settings.from_env({
+        "DATABASE_URL": "postgresql://app@db/booking",
+        "DB_POOL_SIZE": "20",
+        "DB_POOL_TIMEOUT": "2.5",
+        "DB_POOL_PRE_PING": "false",
+        "USE_ASYNC_DB": "1",
+        # Не поле настроек и поле в нижнем регистре - игнорируются
+        "UNRELATED": "x",
+        "db_max_overflow": "99",
+    })
+    assert (parsed.db_pool_size, parsed.db_pool_timeout) == (20, 2.5)
+    assert parsed.db_pool_pre_ping is False and parsed.use_async_db is True
+    assert parsed.db_max_overflow == defaults.db_max_overflow
+    assert parsed.get_async_database_url() == "postgresql+asyncpg://app@db/booking"
+    assert Settings(database_url="sqlite:///./x.db").get_async_database_url() == "sqlite+aiosqlite:///./x.db"
+
+    with pytest.raises(ValueError):
+        Settings.from_env({"DB_POOL_SIZE": "many"})
+
+
+def test_in_memory_sqlite_uses_static_pool_and_file_sqlite_a_sized_pool(tmp_path):
+    memory = create_db_engine(Settings(database_url="sqlite://"))
+    assert isinstance(memory.pool, StaticPool)
+    memory.dispose()
+
+    file_engine = create_db_engine(Settings(database_url=f"sqlite:///{tmp_path / 'pool.db'}", db_pool_size=3))
+    assert isinstance(file_engine.pool, TimedQueuePool)
+    assert file_engine.pool.size() == 3
+    file_engine.dispose()
+
+
+def test_postgres_statement_timeout_goes_to_connect_args():
+    url = make_url("postgresql://app@db/booking")
+    settings = Settings(database_url=str(url), db_statement_timeout_ms=5000, db_pool_size=7)
+    sync = _engine_options(url, settings)
+    assert sync["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert (sync["poolclass"], sync["pool_size"]) == (TimedQueuePool, 7)
+
+    async_options = _engine_options(make_url("postgresql+asyncpg://app@db/booking"), settings, is_async=True)
+    assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+    # 0 - без ограничения
+    assert _engine_options(url, Settings(database_url=str(url)))["connect_args"] == {}
+
+
+def test_timed_pool_records_checkouts_waits_and_timeouts(tmp_path):
+    db_engine = create_db_engine(Settings(
+        database_url=f"sqlite:///{tmp_path / 'timed.db'}", db_pool_size=1, db_max_overflow=0, db_pool_timeout=0.05
+    ))
+    checkouts, timeouts = pool_stats.checkouts, pool_stats.timeouts
+    held = db_engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        db_engine.connect()
+    held.close()
+    with db_engine.connect():
+        pass
+    assert pool_stats.checkouts == checkouts + 3
+    assert pool_stats.timeouts == timeouts + 1
+    # Ожидание до таймаута пула попадает в максимум
+    assert pool_stats.wait_max >= 0.05
+    db_engine.dispose()
+
+    status = get_pool_status()
+    assert status["checkouts"] == pool_stats.checkouts and status["timeouts"] == pool_stats.timeouts
+    assert status["wait_max_ms"] >= 50 and status["wait_avg_ms"] > 0
+    assert set(status["sync"]) == {"size", "checked_out", "checked_in", "overflow"}
+
+
+def pragmas(db_engine, *names):
+    with db_engine.connect() as connection:
+        values = [connection.execute(text(f"PRAGMA {name}")).scalar() for name in names]
+    db_engine.dispose()
+    return values
+
+
+def test_sqlite_profile_is_applied_to_file_database(tmp_path):
+    db_engine = create_db_engine(Settings(database_url=f"sqlite:///{tmp_path / 'tuned.db'}"))
+    assert pragmas(db_engine, "journal_mode", "synchronous", "busy_timeout", "temp_store", "mmap_size") == [
+        "wal", 1, 5000, 2, 268435456
+    ]
+
+
+def test_sqlite_tuning_can_be_disabled(tmp_path):
+    settings = Settings.from_env({"DATABASE_URL": f"sqlite:///{tmp_path / 'plain.db'}", "SQLITE_TUNING": "0"})
+    # Значения SQLite по умолчанию: rollback-журнал и synchronous=FULL
+    assert pragmas(create_db_engine(settings), "journal_mode", "synchronous") == ["delete", 2]
+
+
+def test_in_memory_sqlite_skips_wal_and_mmap():
+    names = [name for name, _ in sqlite_pragmas(Settings(), in_memory=True)]
+    assert "journal_mode" not in names and "mmap_size" not in names
+    db_engine = create_db_engine(Settings(database_url="sqlite://"))
+    # mmap у in-memory базы нет - PRAGMA mmap_size не возвращает строку
+    assert pragmas(db_engine, "journal_mode", "mmap_size", "synchronous") == ["memory", None, 1]
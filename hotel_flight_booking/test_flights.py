@@ -0,0 +1,236 @@
+# test_flights.py
+import datetime
+import threading
+
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from models import Flight
+from seat_inventory import seat_inventory
+from seat_reservation import reserve_seats
+from settings import Settings
+
+
+def add_flight(db, total_seats=10, booked_seats=0, from_city="Moscow", to_city="Paris"):
+    departure = datetime.datetime.now() + datetime.timedelta(days=1)
+    flight = Flight(
+        from_city=from_city, to_city=to_city,
+        departure=departure, arrival=departure + datetime.timedelta(hours=3),
+        total_seats=total_seats, booked_seats=booked_seats, price=100
+    )
+    db.add(flight)
+    db.commit()
+    return flight.id
+
+
+def test_book_flight_reserves_all_legs(client, db, user_headers):
+    first, second = add_flight(db), add_flight(db, from_city="Paris", to_city="London")
+    response = client.post("/flights/book", json={"flight_ids": [first, second], "passengers": 3}, headers=user_headers)
+    assert response.status_code == 200
+    assert [f.booked_seats for f in db.query(Flight).order_by(Flight.id)] == [3, 3]
+    bookings = client.get("/flights/my-bookings", headers=user_headers).json()
+    assert sorted(b["flight_id"] for b in bookings) == [first, second]
+    assert {b["flight"]["to_city"] for b in bookings} == {"Paris", "London"}
+
+
+def test_book_flight_reports_failed_legs_and_reserves_nothing(client, db, user_headers):
+    free, full = add_flight(db), add_flight(db, total_seats=10, booked_seats=9)
+    response = client.post("/flights/book", json={"flight_ids": [free, full, 999], "passengers": 2}, headers=user_headers)
+    assert response.status_code == 404
+    assert response.json()["detail"]["legs"] == [
+        {"flight_id": full, "error": "not_enough_seats", "available": 1},
+        {"flight_id": 999, "error": "not_found"},
+    ]
+    db.expire_all()
+    assert [f.booked_seats for f in db.query(Flight).order_by(Flight.id)] == [0, 9]
+
+
+def test_flight_search_cache_is_invalidated_by_booking(client, db, user_headers):
+    flight_id = add_flight(db)
+    params = {"from_city": "Moscow", "to_city": "Paris"}
+    assert client.get("/flights/", params=params).json()[0]["available"] == 10
+    assert client.get("/flights/", params=params).headers["X-Cache"] == "HIT"
+    client.post("/flights/book", json={"flight_ids": [flight_id], "passengers": 4}, headers=user_headers)
+    response = client.get("/flights/", params=params)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()[0]["available"] == 6
+
+
+def test_concurrent_reservations_never_overbook(tmp_path):
+    engine = create_db_engine(Settings(database_url=f"sqlite:///{tmp_path / 'stress.db'}", db_pool_size=20))
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    setup = Session()
+    legs = [add_flight(setup, total_seats=25), add_flight(setup, total_seats=31, from_city="Paris", to_city="London")]
+    setup.close()
+
+    results = []
+    barrier = threading.Barrier(20)
+
+    def book():
+        db = Session()
+        try:
+            barrier.wait()
+            for _ in range(3):
+                failures = reserve_seats(db, legs, 2)
+                if not failures:
+                    db.commit()
+                results.append(not failures)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=book) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = Session()
+    booked = [f.booked_seats for f in db.query(Flight).order_by(Flight.id)]
+    db.close()
+    engine.dispose()
+    # 25 мест на первом сегменте - ровно 12 броней по 2 пассажира
+    assert results.count(True) == 12
+    assert booked == [24, 24]
+
+
+def test_book_flight_retry_with_idempotency_key_reserves_seats_once(client, db, user_headers):
+    flight_id = add_flight(db)
+    headers = {**user_headers, "Idempotency-Key": "purchase-1"}
+    payload = {"flight_ids": [flight_id], "passengers": 2}
+    responses = [client.post("/flights/book", json=payload, headers=headers) for _ in range(3)]
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert [r.headers.get("Idempotent-Replayed") for r in responses] == [None, "true", "true"]
+    db.expire_all()
+    assert db.get(Flight, flight_id).booked_seats == 2
+
+
+def test_flight_search_is_served_from_seat_inventory(client, db, user_headers, statements):
+    first = add_flight(db)
+    # Одно свободное место - не подходит для двух пассажиров
+    add_flight(db, total_seats=10, booked_seats=9)
+    params = {"from_city": "Moscow", "to_city": "Paris", "passengers": 2}
+    assert [f["id"] for f in client.get("/flights/", params=params).json()] == [first]
+
+    # Другие параметры - мимо кэша ответов, но без запросов к flights
+    statements.clear()
+    response = client.get("/flights/", params={**params, "passengers": 1})
+    assert [f["available"] for f in response.json()] == [10, 1]
+    assert not any("FROM flights" in s for s in statements)
+
+    # Бронь другого воркера видна после сверки; отказ в брони сразу исправляет счётчик
+    db.query(Flight).filter(Flight.id == first).update({"booked_seats": 7})
+    db.commit()
+    assert seat_inventory.reconcile(db) == 1
+    response = client.post("/flights/book", json={"flight_ids": [first], "passengers": 5}, headers=user_headers)
+    assert response.status_code == 400
+    assert client.get("/flights/", params={**params, "passengers": 3}).json()[0]["available"] == 3
+
+
+def test_failed_idempotent_commit_does_not_reserve_seats(client, db, user_headers, monkeypatch):
+    import idempotency
+    from fastapi.testclient import TestClient
+    from sqlalchemy.exc import OperationalError
+
+    flight_id = add_flight(db)
+    record_response = idempotency._record_response
+
+    def locked(*args):
+        monkeypatch.setattr(idempotency, "_record_response", record_response)
+        raise OperationalError("UPDATE idempotency_keys", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(idempotency, "_record_response", locked)
+    client = TestClient(client.app, raise_server_exceptions=False)
+    headers = {**user_headers, "Idempotency-Key": "locked"}
+    payload = {"flight_ids": [flight_id], "passengers": 2}
+    assert client.post("/flights/book", json=payload, headers=headers).status_code == 500
+    assert client.post("/flights/book", json=payload, headers=headers).status_code == 200
+    assert client.post("/flights/book", json=payload, headers=headers).headers["Idempotent-Replayed"] == "true"
+    db.expire_all()
+    assert db.get(Flight, flight_id).booked_seats == 2
+
+
+def add_leg(db, from_city, to_city, departs, hours=2, price=100, total_seats=10, booked_seats=0):
+    """Рейс с вылетом через departs часов после полуночи через два дня."""
+    day = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=2), datetime.time.min)
+    departure = day + datetime.timedelta(hours=departs)
+    flight = Flight(
+        from_city=from_city, to_city=to_city,
+        departure=departure, arrival=departure + datetime.timedelta(hours=hours),
+        total_seats=total_seats, booked_seats=booked_seats, price=price
+    )
+    db.add(flight)
+    db.commit()
+    return flight.id
+
+
+def routes(client, **params):
+    response = client.get("/flights/routes", params={"from_city": "Moscow", "to_city": "Paris", **params})
+    assert response.status_code == 200, response.text
+    return [[f["id"] for f in route["flights"]] for route in response.json()]
+
+
+def test_route_search_finds_direct_and_connecting_flights_within_layover_bounds(client, db):
+    direct = add_leg(db, "Moscow", "Paris", 8, price=300)
+    to_berlin = add_leg(db, "Moscow", "Berlin", 8)
+    connection = add_leg(db, "Berlin", "Paris", 11)
+    # Пересадка 30 минут - меньше MIN_CONNECTION, 25 часов - больше MAX_LAYOVER
+    add_leg(db, "Berlin", "Paris", 10.5, price=50)
+    add_leg(db, "Berlin", "Paris", 35, price=50)
+
+    response = client.get("/flights/routes", params={"from_city": "Moscow", "to_city": "Paris"}).json()
+    assert [[f["id"] for f in route["flights"]] for route in response] == [[to_berlin, connection], [direct]]
+    assert [route["connections"] for route in response] == [1, 0]
+    assert response[0]["price"] == 200 and response[0]["duration_minutes"] == 5 * 60
+    assert routes(client, sort_by="duration") == [[direct], [to_berlin, connection]]
+
+
+def test_route_search_respects_max_connections(client, db):
+    two_stops = [add_leg(db, "Moscow", "Berlin", 0), add_leg(db, "Berlin", "Rome", 3), add_leg(db, "Rome", "Paris", 6)]
+    # Три пересадки - больше MAX_CONNECTIONS
+    add_leg(db, "Moscow", "Oslo", 0, price=10)
+    add_leg(db, "Oslo", "Riga", 3, price=10)
+    add_leg(db, "Riga", "Vienna", 6, price=10)
+    add_leg(db, "Vienna", "Paris", 9, price=10)
+
+    assert routes(client) == [two_stops]
+    assert routes(client, max_connections=1) == []
+    assert routes(client, via_cities=["Rome"]) == [two_stops]
+    assert client.get("/flights/routes", params={
+        "from_city": "Moscow", "to_city": "Paris", "max_connections": 3
+    }).status_code == 422
+
+
+def test_route_search_skips_legs_without_enough_seats(client, db, user_headers):
+    direct = add_leg(db, "Moscow", "Paris", 8, price=300, booked_seats=8)
+    to_berlin = add_leg(db, "Moscow", "Berlin", 8)
+    connection = add_leg(db, "Berlin", "Paris", 11, total_seats=4)
+
+    assert routes(client, passengers=2) == [[to_berlin, connection], [direct]]
+    assert routes(client, passengers=3) == [[to_berlin, connection]]
+    assert routes(client, passengers=5) == []
+
+    # Бронь уменьшает места в загруженном графе без перезагрузки
+    client.post("/flights/book", json={"flight_ids": [to_berlin, connection], "passengers": 2}, headers=user_headers)
+    response = client.get("/flights/routes", params={"from_city": "Moscow", "to_city": "Paris", "passengers": 2}).json()
+    assert [route["available"] for route in response] == [2, 2]
+    assert routes(client, passengers=3) == []
+
+
+def test_route_search_prunes_dead_ends_and_limits_undated_horizon(client, db):
+    from route_search import UNDATED_HORIZON
+
+    to_berlin = add_leg(db, "Moscow", "Berlin", 8)
+    connection = add_leg(db, "Berlin", "Paris", 11)
+    # Из Риги в Париж нет рейсов - сегмент в Ригу не может стать маршрутом
+    add_leg(db, "Moscow", "Riga", 8, price=10)
+    add_leg(db, "Riga", "Oslo", 11, price=10)
+    later_hours = UNDATED_HORIZON.days * 24 + 24
+    later = add_leg(db, "Moscow", "Paris", later_hours)
+
+    assert routes(client) == [[to_berlin, connection]]
+    assert routes(client, max_connections=0) == []
+    assert routes(client, to_city="Tallinn") == []
+    # Рейсы за горизонтом находятся поиском с датой
+    departure = db.get(Flight, later).departure
+    assert routes(client, date=departure.date().isoformat() + "T00:00:00") == [[later]]
@@ -0,0 +1,159 @@
+# test_hotels.py
+import datetime
+
+from models import Booking, Hotel, Room
+
+
+def seed_rooms(db, hotels=20, rooms_per_hotel=10):
+    for h in range(hotels):
+        hotel = Hotel(name=f"Hotel {h}", city="Moscow", stars=1 + h % 5)
+        db.add(hotel)
+        db.flush()
+        for r in range(rooms_per_hotel):
+            db.add(Room(hotel_id=hotel.id, room_type="standard", price=100 + r, capacity=2))
+    db.commit()
+
+
+def test_get_rooms_returns_hotel_names(client, db):
+    seed_rooms(db, hotels=2, rooms_per_hotel=2)
+    rooms = client.get("/hotels/rooms").json()
+    assert len(rooms) == 4
+    assert {r["hotel"] for r in rooms} == {"Hotel 0", "Hotel 1"}
+    assert set(rooms[0]) == {"id", "hotel", "type", "price", "capacity"}
+
+
+def test_get_rooms_query_count_does_not_grow_with_rooms(client, db, statements):
+    seed_rooms(db)
+    statements.clear()
+    response = client.get("/hotels/rooms", params={"sort_by_price": True, "limit": 500})
+    assert response.status_code == 200
+    assert len(response.json()) == 200
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) <= 2, selects
+
+
+def collect_pages(client, path, params):
+    items, cursor = [], None
+    while True:
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        items.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items
+
+
+def test_hotels_keyset_pagination_sorted_by_stars(client, db):
+    seed_rooms(db, hotels=23, rooms_per_hotel=0)
+    hotels = collect_pages(client, "/hotels/", {"sort_by_stars": True, "limit": 5})
+    assert len(hotels) == 23
+    assert [(h["stars"], h["id"]) for h in hotels] == sorted(((h["stars"], h["id"]) for h in hotels), key=lambda k: (-k[0], k[1]))
+
+
+def test_rooms_keyset_pagination_sorted_by_price(client, db):
+    seed_rooms(db, hotels=3, rooms_per_hotel=7)
+    rooms = collect_pages(client, "/hotels/rooms", {"sort_by_price": True, "limit": 4})
+    assert len({r["id"] for r in rooms}) == 21
+    assert [r["price"] for r in rooms] == sorted(r["price"] for r in rooms)
+
+
+def test_invalid_cursor_is_rejected(client, db):
+    assert client.get("/hotels/", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_cursor_values_of_wrong_type_are_rejected(client, db, user_headers):
+    from pagination import encode_cursor
+
+    seed_rooms(db, hotels=2, rooms_per_hotel=2)
+    for path, params, values in [
+        ("/hotels/", {"sort_by_stars": True}, ["four", 1]),
+        ("/hotels/", {"sort_by_stars": True}, [4, True]),
+        ("/hotels/", {}, [None]),
+        ("/hotels/rooms", {"sort_by_price": True}, [{"$gt": 0}, 1]),
+        ("/bookings/my-bookings", {}, [123, 1]),
+        ("/bookings/my-bookings", {}, ["tomorrow", 1]),
+    ]:
+        response = client.get(path, params={**params, "cursor": encode_cursor(values)}, headers=user_headers)
+        assert response.status_code == 400, (path, values, response.text)
+        assert response.json() == {"detail": "Invalid cursor"}
+    assert client.get("/hotels/rooms", params={"sort_by_price": True, "cursor": encode_cursor([100, 1])}).status_code == 200
+
+
+def test_hotels_without_stars_are_paginated_last(client, db):
+    seed_rooms(db, hotels=7, rooms_per_hotel=0)
+    # Без категории - stars = 0 по умолчанию
+    db.add_all([Hotel(name=f"Unrated {i}", city="Moscow") for i in range(5)])
+    db.commit()
+    hotels = collect_pages(client, "/hotels/", {"sort_by_stars": True, "limit": 3})
+    assert len(hotels) == 12
+    assert [h["stars"] for h in hotels] == [5, 4, 3, 2, 2, 1, 1] + [0] * 5
+    assert [h["id"] for h in hotels[-5:]] == [8, 9, 10, 11, 12]
+
+
+def test_free_rooms_excludes_overlapping_bookings(client, db, statements):
+    seed_rooms(db, hotels=2, rooms_per_hotel=3)
+    db.add(Hotel(name="Elsewhere", city="Kazan", stars=3))
+    rooms = [room_id for (room_id,) in db.query(Room.id).order_by(Room.id)]
+    day = datetime.datetime(2030, 1, 1)
+    db.add_all([
+        Booking(user_id=1, room_id=rooms[0], start_date=day, end_date=day + datetime.timedelta(days=3)),
+        # Выезд в день заезда поиска - не пересечение
+        Booking(user_id=1, room_id=rooms[1], start_date=day - datetime.timedelta(days=2), end_date=day + datetime.timedelta(days=1)),
+        Booking(user_id=1, room_id=rooms[2], start_date=day - datetime.timedelta(days=5), end_date=day - datetime.timedelta(days=1)),
+    ])
+    db.commit()
+    statements.clear()
+    params = {
+        "city": "Moscow",
+        "start_date": (day + datetime.timedelta(days=1)).isoformat(),
+        "end_date": (day + datetime.timedelta(days=4)).isoformat(),
+    }
+    response = client.get("/hotels/rooms/free", params=params)
+    assert response.status_code == 200
+    assert {r["id"] for r in response.json()} == set(rooms) - {rooms[0]}
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+    params["end_date"] = params["start_date"]
+    assert client.get("/hotels/rooms/free", params=params).status_code == 400
+
+
+def test_hotel_search_is_cached_until_hotel_changes(client, db, admin_headers, statements):
+    seed_rooms(db, hotels=3, rooms_per_hotel=0)
+    params = {"stars": 1, "city": "Moscow"}
+    first = client.get("/hotels/", params=params)
+    assert first.headers["X-Cache"] == "MISS"
+    assert "max-age" in first.headers["Cache-Control"]
+
+    statements.clear()
+    # Порядок параметров не влияет на ключ
+    second = client.get("/hotels/", params={"city": "Moscow", "stars": 1})
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert statements == []
+
+    not_modified = client.get("/hotels/", params=params, headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+
+    client.post("/hotels/", json={"name": "New", "city": "Moscow", "stars": 1}, headers=admin_headers)
+    fresh = client.get("/hotels/", params=params)
+    assert fresh.headers["X-Cache"] == "MISS"
+    assert len(fresh.json()) == len(first.json()) + 1
+    assert fresh.headers["ETag"] != first.headers["ETag"]
+
+    stats = client.get("/admin/cache", headers=admin_headers).json()
+    assert stats["hits"] == 2 and stats["misses"] == 2
+
+
+def test_profiling_reports_statements_per_route(client, db, admin_headers):
+    from profiling import profile_store
+    seed_rooms(db, hotels=2, rooms_per_hotel=2)
+    profile_store.clear()
+    response = client.get("/hotels/rooms", params={"limit": 1})
+    timing = response.headers["Server-Timing"]
+    assert 'desc="1 queries"' in timing and "app;dur=" in timing
+
+    profile = client.get("/debug/profile", headers=admin_headers).json()
+    route = next(r for r in profile["routes"] if r["route"] == "/hotels/rooms")
+    assert route["requests"] == 1 and route["max_statements"] == 1
+    assert profile["recent"][0]["slowest_sql"].lstrip().upper().startswith("SELECT")
+    assert client.get("/debug/profile").status_code == 401
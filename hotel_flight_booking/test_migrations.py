@@ -0,0 +1,129 @@
+# test_migrations.py
+import datetime
+import os
+import subprocess
+import sys
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from booking_history import flight_bookings_query, room_bookings_query
+from database import Base, create_schema
+from init_db import alembic_config, migrate
+from models import Booking, Flight, FlightBooking, Hotel
+from pagination import encode_cursor, page_query
+from room_search import room_listing_query
+from schemas import BookingPeriod, RoomFilter, RoomSearch
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+NOW = datetime.datetime(2026, 1, 1)
+
+
+def quiet_config():
+    config = alembic_config()
+    config.attributes["configure_logger"] = False
+    return config
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    """Файловая SQLite-база, доведённая миграциями до head."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    migrate(quiet_config(), engine)
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, statement):
+    """Строки EXPLAIN QUERY PLAN для SQLAlchemy-запроса."""
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        return [row[3] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+
+def assert_uses_index(plan, table, index):
+    assert any(line.startswith(f"SEARCH {table} USING") and index in line for line in plan), plan
+    assert not any(line.startswith(f"SCAN {table}") for line in plan), plan
+
+
+def test_migrations_match_models(migrated):
+    with migrated.connect() as connection:
+        diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    assert diff == []
+
+
+def test_migrate_adopts_create_all_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    create_schema(engine)
+    config = quiet_config()
+    migrate(config, engine)
+    with engine.connect() as connection:
+        head = ScriptDirectory.from_config(config).get_current_head()
+        assert connection.scalar(text("SELECT version_num FROM alembic_version")) == head
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    engine.dispose()
+
+
+def test_importing_app_does_not_touch_database(tmp_path):
+    database = tmp_path / "app.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    subprocess.run([sys.executable, "-c", "import main"], cwd=HERE, env=env, check=True)
+    assert not database.exists()
+
+
+def test_hot_queries_use_indexes(migrated):
+    with Session(migrated) as db:
+        flights = db.query(Flight.id).filter(
+            Flight.from_city == "Moscow", Flight.to_city == "Paris",
+            (Flight.total_seats - Flight.booked_seats) >= 1
+        ).statement
+        conflict = db.query(Booking.id).filter(
+            Booking.room_id == 1, Booking.start_date < NOW, Booking.end_date > NOW
+        ).statement
+    assert_uses_index(query_plan(migrated, flights), "flights", "ix_flights_route_departure")
+    assert_uses_index(query_plan(migrated, conflict), "bookings", "ix_bookings_room_dates")
+
+    rooms = room_listing_query(RoomFilter(hotel_id=1))
+    assert_uses_index(query_plan(migrated, rooms), "rooms", "ix_rooms_hotel_type_price")
+
+    free = room_listing_query(RoomSearch(
+        hotel_id=1, start_date=NOW, end_date=NOW + datetime.timedelta(days=2)
+    ))
+    plan = query_plan(migrated, free)
+    assert_uses_index(plan, "rooms", "ix_rooms_hotel_type_price")
+    assert_uses_index(plan, "bookings", "ix_bookings_room_dates")
+
+    for when in (None, BookingPeriod.UPCOMING, BookingPeriod.PAST):
+        query, _ = room_bookings_query(1, when, NOW)
+        assert_uses_index(query_plan(migrated, query), "bookings", "ix_bookings_user_start")
+        query, _ = flight_bookings_query(1, when, NOW)
+        assert_uses_index(query_plan(migrated, query), "flight_bookings", "ix_flight_bookings_user")
+
+    passengers = select(FlightBooking.id).where(FlightBooking.flight_id == 1)
+    assert_uses_index(query_plan(migrated, passengers), "flight_bookings", "ix_flight_bookings_flight")
+
+    # Страница отелей по звёздам читается из индекса в нужном порядке, без сортировки
+    keys = [(Hotel.stars, True), (Hotel.id, False)]
+    for cursor in (None, encode_cursor([4, 17])):
+        with Session(migrated) as db:
+            hotels = page_query(db.query(Hotel).filter(Hotel.city == "Moscow"), keys, 10, cursor).statement
+        plan = query_plan(migrated, hotels)
+        assert_uses_index(plan, "hotels", "ix_hotels_city_stars_id")
+        assert not any("TEMP B-TREE" in line for line in plan), plan
+
+
+def test_migration_fills_missing_hotel_stars(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stars.db'}")
+    config = quiet_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "0003")
+        connection.execute(text("INSERT INTO hotels (name, city, stars) VALUES ('Old', 'Moscow', NULL)"))
+        command.upgrade(config, "head")
+        assert connection.scalar(text("SELECT stars FROM hotels")) == 0
+    engine.dispose()
@@ -0,0 +1,108 @@
+# test_users.py
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from password_hashing import PasswordHasher, password_hasher
+
+
+@pytest.fixture
+def inline_hasher(monkeypatch):
+    # Хэширование в потоках вместо пула процессов - быстрее для тестов
+    monkeypatch.setattr(password_hasher, "workers", 0)
+    return password_hasher
+
+
+def test_register_and_login_round_trip(client, db, inline_hasher):
+    response = client.post("/users/register", json={"name": "Ann", "email": "ann@example.com", "password": "secret1"})
+    assert response.status_code == 200
+    assert response.json()["role"] == "user"
+    assert client.post("/users/register", json={
+        "name": "Ann", "email": "ann@example.com", "password": "secret1"
+    }).status_code == 400
+
+    login = client.post("/users/login", data={"username": "ann@example.com", "password": "secret1"})
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.get("/users/me", headers=headers).json()["email"] == "ann@example.com"
+    assert client.post("/users/login", data={"username": "ann@example.com", "password": "wrong"}).status_code == 401
+
+
+def test_password_hasher_rejects_requests_over_queue_cap():
+    hasher = PasswordHasher(workers=0, max_concurrency=1, max_queue=1)
+    release = threading.Event()
+
+    def slow_hash(password):
+        release.wait(5)
+        return password[::-1]
+
+    async def scenario():
+        running = asyncio.create_task(hasher._run("hash", slow_hash, "first"))
+        waiting = asyncio.create_task(hasher._run("hash", slow_hash, "second"))
+        while hasher.waiting < 1:
+            await asyncio.sleep(0.001)
+        # Один хэш выполняется, один ждёт - третий сразу получает 503
+        with pytest.raises(HTTPException) as rejected:
+            await hasher._run("hash", slow_hash, "third")
+        release.set()
+        return rejected.value, await running, await waiting
+
+    rejected, first, second = asyncio.run(scenario())
+    assert rejected.status_code == 503 and rejected.headers == {"Retry-After": "1"}
+    assert (first, second) == ("tsrif", "dnoces")
+    assert hasher.rejected == 1 and hasher.completed == 2
+
+
+def test_register_returns_503_when_hash_queue_is_full(client, db, inline_hasher, monkeypatch):
+    monkeypatch.setattr(inline_hasher, "max_queue", 0)
+    response = client.post("/users/register", json={"name": "Bob", "email": "bob@example.com", "password": "secret1"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.post("/users/login", data={"username": "bob@example.com", "password": "secret1"}).status_code == 401
+
+
+def test_principal_cache_serves_repeated_requests_without_user_query(client, db, statements):
+    from conftest import make_user
+    from principal_cache import principal_cache
+
+    user, headers = make_user(db)
+    assert client.get("/users/me", headers=headers).json()["name"] == "user"
+    hits = principal_cache.hits
+    statements.clear()
+    assert client.get("/users/me", headers=headers).json()["name"] == "user"
+    assert principal_cache.hits == hits + 1
+    assert not any("FROM users" in s for s in statements)
+
+
+def test_update_user_name_invalidates_cached_principal(client, db):
+    from conftest import make_user
+    from principal_cache import principal_cache
+
+    user, headers = make_user(db)
+    client.get("/users/me", headers=headers)
+    assert client.put("/users/me", json={"name": "Renamed"}, headers=headers).json()["name"] == "Renamed"
+    assert principal_cache.stats()["size"] == 0
+    assert client.get("/users/me", headers=headers).json()["name"] == "Renamed"
+
+
+def test_principal_cache_entries_expire(monkeypatch):
+    import principal_cache as module
+    from models import User
+
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "time", lambda: now[0])
+    cache = module.PrincipalCache(maxsize=10, ttl=60)
+    user = User(id=1, name="ann", email="ann@example.com", role="user")
+    cache.put("token", None, user)
+    # exp токена раньше TTL - запись живёт до exp
+    cache.put("short", now[0] + 10, user)
+    assert cache.get("token")["name"] == "ann"
+
+    now[0] += 11
+    assert cache.get("short") is None
+    assert cache.get("token") is not None
+    now[0] += 50
+    assert cache.get("token") is None
+    assert cache.stats() == {"size": 0, "hits": 2, "misses": 2, "evictions": 0}